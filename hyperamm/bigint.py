@@ -0,0 +1,112 @@
+# bigint.py
+# Exact big-integer columns (uint128 liquidity, int256 amounts, uint160 prices) as
+# base-1e9 int64 limbs, so sums and cumulative sums stay vectorized in numpy.
+# pip install numpy pyarrow
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+BASE = 10 ** 9
+DIGITS = 9     # decimal digits per limb
+LIMBS = 9      # 81 digits: enough for any int256
+
+
+def from_strings(values, limbs=LIMBS):
+    """(n, limbs) int64 array, least significant limb first, from decimal strings or ints.
+
+    Strings are zero-padded to a whole number of limbs in Arrow and the digits
+    read straight from its character buffer, so there is no per-value Python
+    loop. Negative values get negative limbs.
+    """
+    arr = values if isinstance(values, (pa.Array, pa.ChunkedArray)) else pa.array(np.asarray(values).astype(str))
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    arr = pc.utf8_trim_whitespace(arr.cast(pa.string()))
+    out = np.zeros((len(arr), limbs), dtype=np.int64)
+    if not len(arr):
+        return out
+    if arr.null_count:
+        raise ValueError("missing value in big-integer column")
+    neg = pc.starts_with(arr, "-").to_numpy(zero_copy_only=False)
+    arr = pc.utf8_ltrim(arr, "+-")
+    used = -(-max(pc.max(pc.utf8_length(arr)).as_py(), 1) // DIGITS)
+    if used > limbs:
+        raise ValueError(f"value with more than {limbs * DIGITS} digits")
+    width = used * DIGITS
+    padded = pc.utf8_lpad(arr, width, "0")
+    offsets = np.frombuffer(padded.buffers()[1], dtype=np.int32)[padded.offset:padded.offset + len(padded) + 1]
+    chars = np.frombuffer(padded.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    if len(chars) != len(arr) * width:
+        raise ValueError("not a decimal integer column")
+    digits = chars.reshape(len(arr), used, DIGITS) - np.uint8(48)
+    if (digits > 9).any():
+        bad = arr[int(np.flatnonzero((digits > 9).any(axis=(1, 2)))[0])]
+        raise ValueError(f"not a decimal integer: {bad}")
+    acc = digits[:, :, 0].astype(np.int64)
+    for k in range(1, DIGITS):
+        acc = acc * 10 + digits[:, :, k]
+    out[:, :used] = acc[:, ::-1]
+    out[neg] *= -1
+    return out
+
+
+def normalize(limbs):
+    """Carry every limb but the top one into [0, BASE); the top limb keeps the sign."""
+    out = np.array(limbs, dtype=np.int64)
+    for i in range(out.shape[-1] - 1):
+        carry = np.floor_divide(out[..., i], BASE)
+        out[..., i] -= carry * BASE
+        out[..., i + 1] += carry
+    return out
+
+
+def cumsum(limbs):
+    """Exact running sum down the rows (limbwise cumsum, then one carry pass)."""
+    return normalize(np.cumsum(limbs, axis=0))
+
+
+def group_sum(keys, limbs):
+    """Exact sum of the rows sharing a key: (sorted unique keys, (k, limbs) sums)."""
+    keys = np.asarray(keys)
+    if not len(keys):
+        return keys, np.zeros((0, limbs.shape[1]), dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    k = keys[order]
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    return k[starts], normalize(np.add.reduceat(limbs[order], starts, axis=0))
+
+
+def is_negative(limbs):
+    return normalize(limbs)[..., -1] < 0
+
+
+def argsort(limbs, descending=False):
+    """Stable exact ordering of the rows by value."""
+    x = normalize(limbs)
+    if descending:
+        x = -x
+    # lexsort keys are least significant first; the signed top limb decides first
+    return np.lexsort([x[:, i] for i in range(x.shape[1])])
+
+
+def to_strings(limbs):
+    """Exact decimal strings, one per row."""
+    x = normalize(limbs)
+    neg = x[:, -1] < 0
+    x[neg] = normalize(-x[neg])
+    s = x[:, -1].astype("U")
+    for i in range(x.shape[1] - 2, -1, -1):
+        s = np.char.add(s, np.char.zfill(x[:, i].astype("U"), DIGITS))
+    s = np.char.lstrip(s, "0")
+    s = np.where(s == "", "0", s)
+    return np.where(neg, np.char.add("-", s), s).astype(object)
+
+
+def to_float(limbs):
+    """Nearest float64 of each row (for plotting and scaled prices, not for sums)."""
+    x = normalize(limbs).astype(np.float64)
+    out = np.zeros(x.shape[:-1])
+    for i in range(x.shape[-1] - 1, -1, -1):
+        out = out * BASE + x[..., i]
+    return out
@@ -0,0 +1,105 @@
+# block_time.py
+# Timestamp -> block resolution by interpolation search over a persisted
+# sparse block -> timestamp index (kept in the RPC cache database).
+# pip install web3
+
+import sqlite3
+
+from rpc import retry_call
+
+
+class BlockTimeIndex:
+    """Known (block, timestamp) pairs of final blocks, persisted in SQLite.
+
+    Shares the database of an :class:`rpc_cache.RpcCache` when one is given,
+    otherwise lives in memory for the run. Every timestamp the scanner or the
+    resolver fetches is recorded, so later lookups start from a tight bracket.
+    """
+
+    def __init__(self, rpc_cache=None, chain_id=None):
+        self.rpc_cache = rpc_cache
+        self.db = rpc_cache.db if rpc_cache is not None else sqlite3.connect(":memory:", check_same_thread=False)
+        self.chain_id = chain_id if chain_id is not None else getattr(rpc_cache, "chain_id", 0)
+        self.db.execute("CREATE TABLE IF NOT EXISTS block_ts (chain_id INTEGER, block INTEGER, ts INTEGER, "
+                        "PRIMARY KEY (chain_id, block))")
+        self.db.commit()
+
+    def _is_final(self, block):
+        return self.rpc_cache is None or self.rpc_cache.is_final(block)
+
+    def get_many(self, blocks):
+        """{block: timestamp} for the blocks that are in the index."""
+        out = {}
+        blocks = list(blocks)
+        for i in range(0, len(blocks), 500):
+            part = blocks[i:i + 500]
+            q = f"SELECT block, ts FROM block_ts WHERE chain_id = ? AND block IN ({','.join('?' * len(part))})"
+            out.update(self.db.execute(q, (self.chain_id, *part)).fetchall())
+        return out
+
+    def put_many(self, pairs):
+        rows = [(self.chain_id, int(b), int(t)) for b, t in pairs if self._is_final(int(b))]
+        if rows:
+            self.db.executemany("INSERT OR REPLACE INTO block_ts (chain_id, block, ts) VALUES (?, ?, ?)", rows)
+            self.db.commit()
+
+    def bracket(self, ts):
+        """Closest known (block, ts) strictly before ``ts`` and at/after it (either may be None)."""
+        lo = self.db.execute("SELECT block, ts FROM block_ts WHERE chain_id = ? AND ts < ? "
+                             "ORDER BY ts DESC, block DESC LIMIT 1", (self.chain_id, ts)).fetchone()
+        hi = self.db.execute("SELECT block, ts FROM block_ts WHERE chain_id = ? AND ts >= ? "
+                             "ORDER BY ts ASC, block ASC LIMIT 1", (self.chain_id, ts)).fetchone()
+        return lo, hi
+
+
+class BlockTimes:
+    """Block timestamps and timestamp -> block lookups for one chain."""
+
+    def __init__(self, w3, rpc_cache=None):
+        self.w3 = w3
+        self.index = BlockTimeIndex(rpc_cache)
+        self.fetched = 0
+
+    def timestamp(self, block):
+        ts = self.index.get_many([block]).get(block)
+        if ts is None:
+            ts = retry_call(lambda: self.w3.eth.get_block(block)).timestamp
+            self.fetched += 1
+            self.index.put_many([(block, ts)])
+        return ts
+
+    def block_for_time(self, ts_utc, lo=1, hi=None):
+        """First block with timestamp >= ``ts_utc`` (``hi`` if every block is earlier).
+
+        Interpolates on the timestamps of the current bracket, falling back to
+        a bisection step whenever an interpolation step fails to halve it, so a
+        cold lookup takes a handful of calls and a warm one usually none.
+        """
+        if hi is None:
+            hi = retry_call(lambda: self.w3.eth.block_number)
+        known_lo, known_hi = self.index.bracket(ts_utc)
+        if known_lo is not None and lo <= known_lo[0] <= hi:
+            lo = known_lo[0]
+        if known_hi is not None and lo <= known_hi[0] <= hi:
+            hi = known_hi[0]
+        t_lo, t_hi = self.timestamp(lo), self.timestamp(hi)
+        if t_lo >= ts_utc:
+            return lo
+        if t_hi < ts_utc:
+            return hi
+        # invariant: t_lo < ts_utc <= t_hi
+        bisect_next = False
+        while hi - lo > 1:
+            width = hi - lo
+            if bisect_next or t_hi == t_lo:
+                mid = (lo + hi) // 2
+            else:
+                mid = lo + int((ts_utc - t_lo) * width / (t_hi - t_lo))
+            mid = min(max(mid, lo + 1), hi - 1)
+            t_mid = self.timestamp(mid)
+            if t_mid < ts_utc:
+                lo, t_lo = mid, t_mid
+            else:
+                hi, t_hi = mid, t_mid
+            bisect_next = not bisect_next and (hi - lo) * 2 > width
+        return hi
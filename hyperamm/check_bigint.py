@@ -0,0 +1,155 @@
+# check_bigint.py
+# Randomized check of the bigint limb math against Python ints: uint128 / int256 values
+# (negatives, zero, the type limits, limb-boundary digit counts) through from_strings,
+# normalize, cumsum, group_sum, is_negative, argsort, to_strings and to_float; from_strings
+# also from Arrow (sliced and chunked) input and on the inputs it must refuse.
+# Run from hyperamm/: python check_bigint.py [rounds] [seed]   (exits 1 on any mismatch)
+# pip install numpy pyarrow
+
+import random
+import sys
+
+import numpy as np
+import pyarrow as pa
+
+import bigint
+from bigint import BASE
+
+EDGES = [0, 1, -1, BASE - 1, BASE, -BASE, BASE ** 2 - 1, -(BASE ** 2),
+         2 ** 128 - 1, -(2 ** 128 - 1), 2 ** 255 - 1, -(2 ** 255)]
+
+
+def random_values(rng, n):
+    """Mix of uint128 liquidity, signed int256 amounts, small ints and edge values."""
+    out = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.35:
+            out.append(rng.getrandbits(128))
+        elif kind < 0.7:
+            out.append(rng.randrange(-(2 ** 255), 2 ** 255))
+        elif kind < 0.85:
+            # any digit count, so values end on and around the 9-digit limb boundaries
+            out.append(rng.choice((1, -1)) * rng.randrange(10 ** rng.randrange(1, 78)))
+        elif kind < 0.95:
+            out.append(rng.randrange(-1000, 1000))
+        else:
+            out.append(rng.choice(EDGES))
+    return out
+
+
+def value(row):
+    return sum(int(x) * BASE ** i for i, x in enumerate(row))
+
+
+def values(limbs):
+    return [value(r) for r in limbs]
+
+
+def as_input(rng, vals):
+    """The same values the ways callers pass them: ints, strings (padded, signed), Arrow arrays
+    (plain, sliced so the buffers start at an offset, and chunked)."""
+    form = rng.randrange(6)
+    if form == 0:
+        return vals
+    strs = [str(v) for v in vals]
+    if form == 1:
+        return strs
+    if form == 2:
+        return [(" " if rng.random() < 0.2 else "") + ("+" + s if s[0] != "-" and rng.random() < 0.2 else s)
+                for s in strs]
+    if form == 3:
+        return pa.array(strs)
+    if form == 4:
+        pad = rng.randrange(1, 5)
+        return pa.array(["7" * rng.randrange(1, 30)] * pad + strs + ["-1"]).slice(pad, len(strs))
+    cut = rng.randrange(len(strs) + 1)
+    return pa.chunked_array([pa.array(strs[:cut], pa.string()), pa.array(strs[cut:], pa.string())])
+
+
+def check_round(rng):
+    """Problems found in one random batch, as messages."""
+    bad = []
+    n = rng.randrange(1, 400)
+    vals = random_values(rng, n)
+
+    try:
+        limbs = bigint.from_strings(as_input(rng, vals))
+    except ValueError as e:
+        return [f"from_strings refused valid input: {e}"]
+    if values(limbs) != vals:
+        bad.append("from_strings")
+    if values(bigint.from_strings(vals, limbs=bigint.LIMBS + 2)) != vals:
+        bad.append("from_strings wide")
+
+    # unnormalized limbs, as sums leave them: normalize keeps the value and carries into range
+    raw = np.array([[rng.randrange(-10 ** 15, 10 ** 15) for _ in range(bigint.LIMBS)] for _ in range(n)],
+                   dtype=np.int64)
+    norm = bigint.normalize(raw)
+    if values(norm) != values(raw):
+        bad.append("normalize value")
+    if (norm[:, :-1] < 0).any() or (norm[:, :-1] >= BASE).any():
+        bad.append("normalize limb range")
+
+    running, acc = [], 0
+    for v in vals:
+        acc += v
+        running.append(acc)
+    if values(bigint.cumsum(limbs)) != running:
+        bad.append("cumsum")
+
+    keys = np.array([rng.randrange(-5, 20) for _ in range(n)])
+    want = {}
+    for k, v in zip(keys.tolist(), vals):
+        want[k] = want.get(k, 0) + v
+    got_keys, sums = bigint.group_sum(keys, limbs)
+    if got_keys.tolist() != sorted(want) or values(sums) != [want[k] for k in sorted(want)]:
+        bad.append("group_sum")
+
+    if bigint.is_negative(limbs).tolist() != [v < 0 for v in vals]:
+        bad.append("is_negative")
+
+    idx = list(range(n))
+    if bigint.argsort(limbs).tolist() != sorted(idx, key=lambda i: vals[i]):
+        bad.append("argsort")
+    if bigint.argsort(limbs, descending=True).tolist() != sorted(idx, key=lambda i: -vals[i]):
+        bad.append("argsort descending")
+
+    if bigint.to_strings(limbs).tolist() != [str(v) for v in vals]:
+        bad.append("to_strings")
+    if bigint.to_strings(raw).tolist() != [str(v) for v in values(raw)]:
+        bad.append("to_strings unnormalized")
+
+    got = bigint.to_float(limbs)
+    want_f = np.array([float(v) for v in vals])
+    if not np.allclose(got, want_f, rtol=1e-12, atol=0):
+        bad.append("to_float")
+    return bad
+
+
+def check_errors():
+    """Inputs from_strings must refuse rather than misread."""
+    bad = []
+    for name, vals in [("null", pa.array(["1", None])), ("letters", ["12", "1e5"]),
+                       ("decimal point", ["1.5"]), ("too long", ["9" * (bigint.LIMBS * bigint.DIGITS + 1)])]:
+        try:
+            bigint.from_strings(vals)
+            bad.append(f"from_strings accepted {name}")
+        except ValueError:
+            pass
+    if bigint.from_strings([]).shape != (0, bigint.LIMBS):
+        bad.append("from_strings empty")
+    return bad
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 12345
+    rng = random.Random(seed)
+    failures = check_errors()
+    for r in range(rounds):
+        failures += [f"round {r}: {msg}" for msg in check_round(rng)]
+    for msg in failures:
+        print("  " + msg)
+    print(f"{rounds} round(s), seed {seed}: {'ok' if not failures else f'{len(failures)} failure(s)'}")
+    sys.exit(1 if failures else 0)
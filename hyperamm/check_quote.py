@@ -0,0 +1,162 @@
+# check_quote.py
+# Checks quote.V3Quoter against a range-by-range walk in Decimal on hand-built profiles:
+# price below / above the profile, exactly on a range boundary, and across zero-liquidity gaps.
+# Run from hyperamm/: python check_quote.py   (exits 1 on any mismatch)
+# pip install numpy pandas
+
+import sys
+from decimal import Decimal, getcontext
+
+import numpy as np
+import pandas as pd
+
+from quote import V3Quoter, Q96, FEE_UNITS
+
+getcontext().prec = 60
+DEC0, DEC1, FEE = 18, 6, 3000
+RTOL = 1e-9
+# fractions of the one-way capacity to quote; > 1 must come back NaN
+FRACTIONS = (1e-9, 1e-4, 0.01, 0.2, 0.5, 0.9, 0.999, 1.5)
+NUDGE_DOWN, NUDGE_UP = Decimal("0.999999999999"), Decimal("1.000000000001")
+
+
+def sqrt_at(tick):
+    # the quoter's own float boundaries, so "exactly on a boundary" is exact for both sides
+    return Decimal(float(np.power(1.0001, int(tick) / 2)))
+
+
+def segments(rows, sqrt_price, zero_for_one):
+    """(from, to, L) sqrtP segments in swap order; no liquidity outside the profile or in gaps."""
+    ranges = sorted(zip(rows["tick_L"], rows["tick_U"], rows["L_active"]))
+    out, s = [], sqrt_price
+    order = reversed(ranges) if zero_for_one else ranges
+    for lo, hi, L in order:
+        a, b = sqrt_at(lo), sqrt_at(hi)
+        if zero_for_one and a < s:
+            if s > b:
+                out.append((s, b, Decimal(0)))
+                s = b
+            out.append((s, a, Decimal(int(L))))
+            s = a
+        elif not zero_for_one and b > s:
+            if s < a:
+                out.append((s, a, Decimal(0)))
+                s = a
+            out.append((s, b, Decimal(int(L))))
+            s = b
+    return out
+
+
+def step(a, b, L, zero_for_one):
+    """Raw (input, output) of moving sqrtP from a to b inside one range."""
+    if zero_for_one:
+        return L * (1 / b - 1 / a), L * (a - b)
+    return L * (b - a), L * (1 / a - 1 / b)
+
+
+def ref_walk(rows, sqrt_price, amount, zero_for_one, exact_out=False):
+    """(raw after-fee input, raw output, end sqrtP) walking range by range; None past the profile."""
+    left, amt_in, amt_out = Decimal(amount), Decimal(0), Decimal(0)
+    for a, b, L in segments(rows, sqrt_price, zero_for_one):
+        if L == 0:
+            continue
+        full_in, full_out = step(a, b, L, zero_for_one)
+        full = full_out if exact_out else full_in
+        if left <= full:
+            if exact_out:
+                end = a - left / L if zero_for_one else 1 / (1 / a - left / L)
+            else:
+                end = 1 / (1 / a + left / L) if zero_for_one else a + left / L
+            d_in, d_out = step(a, end, L, zero_for_one)
+            return amt_in + d_in, amt_out + d_out, end
+        amt_in, amt_out, left = amt_in + full_in, amt_out + full_out, left - full
+    return None
+
+
+def capacity(rows, sqrt_price, zero_for_one):
+    """Raw after-fee (input, output) that drains the profile in one direction."""
+    amt_in = amt_out = Decimal(0)
+    for a, b, L in segments(rows, sqrt_price, zero_for_one):
+        d_in, d_out = step(a, b, L, zero_for_one)
+        amt_in, amt_out = amt_in + d_in, amt_out + d_out
+    return amt_in, amt_out
+
+
+def close(got, want):
+    if want is None:
+        return np.isnan(got)
+    return abs(got - float(want)) <= RTOL * abs(float(want)) + 1e-12
+
+
+def check_case(name, rows, sqrt_price_x96):
+    q = V3Quoter(rows, sqrt_price_x96, DEC0, DEC1, FEE)
+    s = Decimal(int(sqrt_price_x96) / Q96)   # exact: the float the quoter reads
+    gross = Decimal(FEE_UNITS) / (FEE_UNITS - FEE)
+    bad = 0
+    for zero_for_one in (True, False):
+        d_in, d_out = (DEC0, DEC1) if zero_for_one else (DEC1, DEC0)
+        cap_in, cap_out = capacity(rows, s, zero_for_one)
+        # sizes at fractions of capacity (of one whole token when there is none that way) and
+        # just short of / just past each boundary; a size ending exactly on one would land on
+        # either side of a gap with float rounding, so the price after it is not well defined
+        net_in = [(cap_in or Decimal(10) ** d_in) * Decimal(f) for f in FRACTIONS]
+        net_out = [(cap_out or Decimal(10) ** d_out) * Decimal(f) for f in FRACTIONS]
+        acc_in = acc_out = Decimal(0)
+        for a, b, L in segments(rows, s, zero_for_one)[:-1]:
+            x, y = step(a, b, L, zero_for_one)
+            acc_in, acc_out = acc_in + x, acc_out + y
+            if L > 0:
+                net_in += [acc_in * NUDGE_DOWN, acc_in * NUDGE_UP]
+                net_out += [acc_out * NUDGE_DOWN, acc_out * NUDGE_UP]
+        for net in net_in:
+            size = net * gross / Decimal(10) ** d_in
+            want = ref_walk(rows, s, net, zero_for_one)
+            got_out = q.exact_in(float(size), zero_for_one)
+            got_px = q.price_after(float(size), zero_for_one)
+            want_out = want and want[1] / Decimal(10) ** d_out
+            want_px = want and want[2] ** 2 * Decimal(10) ** (DEC0 - DEC1)
+            if not (close(got_out, want_out) and close(got_px, want_px)):
+                bad += 1
+                print(f"  {name} exact_in zero_for_one={zero_for_one} size={float(size):.6g}: "
+                      f"out {got_out!r} vs {want_out}, price {got_px!r} vs {want_px}")
+        for net in net_out:
+            size = net / Decimal(10) ** d_out
+            want = ref_walk(rows, s, net, zero_for_one, exact_out=True)
+            got = q.exact_out(float(size), zero_for_one)
+            want_in = want and want[0] * gross / Decimal(10) ** d_in
+            if not close(got, want_in):
+                bad += 1
+                print(f"  {name} exact_out zero_for_one={zero_for_one} size={float(size):.6g}: "
+                      f"in {got!r} vs {want_in}")
+    print(f"{name}: {'ok' if not bad else f'{bad} mismatch(es)'}")
+    return bad
+
+
+def profile(edges, liquidity):
+    return pd.DataFrame({"tick_L": edges[:-1], "tick_U": edges[1:], "L_active": liquidity})
+
+
+def x96_at(tick):
+    """sqrtPriceX96 that V3Quoter reads back as exactly the float boundary of ``tick``."""
+    return int(np.power(1.0001, tick / 2) * Q96)
+
+
+if __name__ == "__main__":
+    # HYPE/USDT-like: 18 / 6 decimals, price ~ 1.0001^-276300 * 1e12 ~ 1.0
+    edges = [-276900, -276600, -276300, -276000, -275700, -275400]
+    stair = profile(edges, [4e17, 9e17, 2.5e18, 1.2e18, 3e17])
+    gapped = profile(edges, [4e17, 0, 2.5e18, 0, 3e17])
+    inside = x96_at(-276210.37)
+    cases = [
+        ("inside", stair, inside),
+        ("below profile", stair, x96_at(-277500)),
+        ("above profile", stair, x96_at(-274800)),
+        ("on boundary", stair, x96_at(-276300)),
+        ("on lower edge", stair, x96_at(-276900)),
+        ("on upper edge", stair, x96_at(-275400)),
+        ("zero-L gaps", gapped, inside),
+        ("inside a gap", gapped, x96_at(-276450)),
+        ("gap boundary", gapped, x96_at(-276000)),
+    ]
+    bad = sum(check_case(*c) for c in cases)
+    sys.exit(1 if bad else 0)
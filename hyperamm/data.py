@@ -2,17 +2,23 @@
 # pip install web3 pandas matplotlib pillow
 
 from web3 import Web3
+from eth_abi import encode as abi_encode, decode as abi_decode
 import pandas as pd
 import matplotlib.pyplot as plt
 import math
-import time
 from pathlib import Path
+from rpc import RpcError, batch_call, retry_call
+from rpc_cache import RpcCache, CachedHTTPProvider
 
 RPC  = "https://hyperliquid.drpc.org/"
 POOL = Web3.to_checksum_address("0x337b56d87a6185cd46af3ac2cdf03cbc37070c30")
 BLOCK = "latest"
 MIN_TICK, MAX_TICK = -887272, 887272   # shrink around current tick later if you want
 
+# Multicall3 (same address on every chain it is deployed to); without it calls go out as JSON-RPC batches
+MULTICALL3 = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_CHUNK = 500   # sub-calls per aggregate3 eth_call
+
 ABI_POOL = [
     {"inputs":[],"name":"slot0","outputs":[
         {"internalType":"uint160","name":"sqrtPriceX96","type":"uint160"},
@@ -23,6 +29,7 @@ ABI_POOL = [
         {"internalType":"uint8","name":"feeProtocol","type":"uint8"},
         {"internalType":"bool","name":"unlocked","type":"bool"}
     ],"stateMutability":"view","type":"function"},
+    {"inputs":[],"name":"fee","outputs":[{"internalType":"uint24","name":"","type":"uint24"}],"stateMutability":"view","type":"function"},
     {"inputs":[],"name":"tickSpacing","outputs":[{"internalType":"int24","name":"","type":"int24"}],"stateMutability":"view","type":"function"},
     {"inputs":[{"internalType":"int16","name":"wordPosition","type":"int16"}],"name":"tickBitmap","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},
     {"inputs":[{"internalType":"int24","name":"tick","type":"int24"}],"name":"ticks","outputs":[
@@ -44,48 +51,115 @@ ABI_ERC20 = [
     {"inputs":[],"name":"decimals","outputs":[{"internalType":"uint8","name":"","type":"uint8"}],"stateMutability":"view","type":"function"},
 ]
 
+def _signature(abi, name):
+    f = next(x for x in abi if x.get("type") == "function" and x["name"] == name)
+    ins = [i["type"] for i in f["inputs"]]
+    return Web3.keccak(text=f"{name}({','.join(ins)})")[:4], ins, [o["type"] for o in f["outputs"]]
+
+AGGREGATE3 = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+def has_multicall(w3, block):
+    return bool(retry_call(lambda: w3.eth.get_code(MULTICALL3, block_identifier=block)))
+
+def multicall(w3, calls, block, aggregate=None, chunk=MULTICALL_CHUNK):
+    """Run view calls [(address, abi, fn_name, args)] at one block number.
+
+    Calls are packed into Multicall3 aggregate3 calls of ``chunk`` sub-calls
+    (plain eth_calls where Multicall3 is not deployed) and sent as JSON-RPC
+    batches, so a few thousand reads take a round trip or two. Returns the
+    decoded outputs in call order; a reverted call (or one with empty or
+    undecodable return data) gives None on both paths. Pass ``aggregate``
+    (see :func:`has_multicall`) to skip the code check.
+    """
+    encoded = []
+    for addr, abi, name, args in calls:
+        selector, ins, outs = _signature(abi, name)
+        encoded.append((addr, selector + abi_encode(ins, list(args)), outs))
+    tag = hex(block)
+    if aggregate is None:
+        aggregate = has_multicall(w3, block)
+    if aggregate:
+        rpc_calls = []
+        for i in range(0, len(encoded), chunk):
+            data = AGGREGATE3 + abi_encode(["(address,bool,bytes)[]"], [[(a, True, d) for a, d, _ in encoded[i:i + chunk]]])
+            rpc_calls.append(("eth_call", [{"to": MULTICALL3, "data": "0x" + data.hex()}, tag]))
+    else:
+        rpc_calls = [("eth_call", [{"to": a, "data": "0x" + d.hex()}, tag]) for a, d, _ in encoded]
+    raw = batch_call(w3.provider.endpoint_uri, rpc_calls, cache=getattr(w3.provider, "rpc_cache", None),
+                     keep_errors=not aggregate)
+    if aggregate:
+        replies = [rep for r in raw for rep in abi_decode(["(bool,bytes)[]"], bytes.fromhex(r[2:]))[0]]
+    else:
+        # a reverted eth_call comes back as an RpcError (or a null result)
+        replies = [(False, b"") if isinstance(r, RpcError) or not r else (True, bytes.fromhex(r[2:]))
+                   for r in raw]
+    out = []
+    for (ok, data), (_, _, outs) in zip(replies, encoded):
+        try:
+            out.append(abi_decode(outs, data) if ok else None)
+        except Exception:
+            out.append(None)    # reverted / empty return data
+    return out
+
 def tick_to_price(tick: int, dec0: int, dec1: int) -> float:
     # token1 per token0
     return (1.0001 ** tick) * (10 ** (dec0 - dec1))
 
-def get_token_meta(w3, addr):
-    c = w3.eth.contract(address=addr, abi=ABI_ERC20)
-    try: sym = c.functions.symbol().call()
-    except: sym = "UNK"
-    dec = c.functions.decimals().call()
-    return sym, dec
+def fetch_tick_state(w3: Web3, pool_addr: str, block="latest",
+                     min_tick=MIN_TICK, max_tick=MAX_TICK) -> tuple[dict, dict]:
+    """Initialized ticks {tick: [liquidityGross, liquidityNet]} and pool state at one block."""
+    # every read below is pinned to this one block, so the snapshot is consistent
+    if not isinstance(block, int):
+        block = retry_call(lambda: w3.eth.get_block(block)).number
+    aggregate = has_multicall(w3, block)
 
-def fetch_liquidity_rows(w3: Web3, pool_addr: str, block="latest",
-                         min_tick=MIN_TICK, max_tick=MAX_TICK) -> tuple[pd.DataFrame, dict]:
-    pool = w3.eth.contract(address=pool_addr, abi=ABI_POOL)
+    def required(calls, optional=()):
+        """multicall() that raises on a reverted call, except for the ``optional`` functions."""
+        out = multicall(w3, calls, block, aggregate)
+        for res, (addr, _, name, args) in zip(out, calls):
+            if res is None and name not in optional:
+                raise RpcError("eth_call", f"{name}{tuple(args)} on {addr} reverted at block {block}")
+        return out
 
     # meta + current
-    tick_spacing = pool.functions.tickSpacing().call()
-    token0 = pool.functions.token0().call()
-    token1 = pool.functions.token1().call()
-    sym0, dec0 = get_token_meta(w3, token0)
-    sym1, dec1 = get_token_meta(w3, token1)
-    sqrtPriceX96, curr_tick, *_ = pool.functions.slot0().call(block_identifier=block)
-
-    # discover initialized ticks
-    init_net = {}
+    (tick_spacing,), (fee,), (token0,), (token1,), slot0 = required([
+        (pool_addr, ABI_POOL, "tickSpacing", ()), (pool_addr, ABI_POOL, "fee", ()), (pool_addr, ABI_POOL, "token0", ()),
+        (pool_addr, ABI_POOL, "token1", ()), (pool_addr, ABI_POOL, "slot0", ())])
+    sqrtPriceX96, curr_tick, *_ = slot0
+    # symbol() is optional in ERC-20
+    sym0, (dec0,), sym1, (dec1,) = required([(t, ABI_ERC20, f, ()) for t in (token0, token1)
+                                             for f in ("symbol", "decimals")], optional=("symbol",))
+    sym0, sym1 = (s[0] if s else "UNK" for s in (sym0, sym1))
+
+    # discover initialized ticks: all bitmap words in one go, then all flagged ticks
     min_w = math.floor(min_tick / tick_spacing / 256)
     max_w = math.floor(max_tick / tick_spacing / 256)
-    for w in range(min_w, max_w + 1):
-        bitmap = pool.functions.tickBitmap(w).call(block_identifier=block)
-        if bitmap == 0:
-            continue
+    words = range(min_w, max_w + 1)
+    bitmaps = required([(pool_addr, ABI_POOL, "tickBitmap", (w,)) for w in words])
+    candidates = []
+    for w, (bitmap,) in zip(words, bitmaps):
         bb = bitmap
         while bb:
             lsb = bb & -bb
             bit = (lsb.bit_length() - 1)
-            index = w * 256 + bit
-            t = index * tick_spacing
-            rec = pool.functions.ticks(t).call(block_identifier=block)
-            if rec[7]:
-                init_net[t] = int(rec[1])
+            t = (w * 256 + bit) * tick_spacing
+            if min_tick <= t <= max_tick:   # words reach past the window's edges
+                candidates.append(t)
             bb ^= lsb
+    recs = required([(pool_addr, ABI_POOL, "ticks", (t,)) for t in candidates])
+    ticks = {t: [int(rec[0]), int(rec[1])] for t, rec in zip(candidates, recs) if rec[7]}
+    state = {
+        "sym0": sym0, "dec0": dec0,
+        "sym1": sym1, "dec1": dec1,
+        "block": block,
+        "tick_spacing": tick_spacing,
+        "fee": fee,
+        "sqrtPriceX96": int(sqrtPriceX96),
+        "curr_tick": int(curr_tick),
+    }
+    return ticks, state
 
+def stair_rows(init_net: dict, dec0: int, dec1: int) -> pd.DataFrame:
     ticks = sorted(init_net.keys())
     # walk ticks: cumulative liquidityNet gives L_active per [t_i, t_{i+1})
     rows = []
@@ -101,14 +175,97 @@ def fetch_liquidity_rows(w3: Web3, pool_addr: str, block="latest",
                 "price_U": tick_to_price(tU, dec0, dec1),
                 "L_active": L_active
             })
-    df = pd.DataFrame(rows)
-    info = {
-        "sym0": sym0, "dec0": dec0,
-        "sym1": sym1, "dec1": dec1,
-        "curr_tick": int(curr_tick),
-        "curr_price": (sqrtPriceX96 / (2**96))**2 * (10 ** (dec0 - dec1))
+    return pd.DataFrame(rows)
+
+def snapshot_info(state: dict) -> dict:
+    dec0, dec1 = state["dec0"], state["dec1"]
+    return {
+        "sym0": state["sym0"], "dec0": dec0,
+        "sym1": state["sym1"], "dec1": dec1,
+        "block": state["block"],
+        "fee": state["fee"],
+        "sqrtPriceX96": state["sqrtPriceX96"],
+        "curr_tick": state["curr_tick"],
+        "curr_price": (state["sqrtPriceX96"] / (2**96))**2 * (10 ** (dec0 - dec1))
     }
-    return df, info
+
+def fetch_liquidity_rows(w3: Web3, pool_addr: str, block="latest",
+                         min_tick=MIN_TICK, max_tick=MAX_TICK) -> tuple[pd.DataFrame, dict]:
+    ticks, state = fetch_tick_state(w3, pool_addr, block, min_tick, max_tick)
+    df = stair_rows({t: net for t, (_, net) in ticks.items()}, state["dec0"], state["dec1"])
+    return df, snapshot_info(state)
+
+# pool events that move liquidity or price
+MINT = Web3.to_hex(Web3.keccak(text="Mint(address,address,int24,int24,uint128,uint256,uint256)"))
+BURN = Web3.to_hex(Web3.keccak(text="Burn(address,int24,int24,uint128,uint256,uint256)"))
+SWAP = Web3.to_hex(Web3.keccak(text="Swap(address,address,int256,int256,uint160,uint128,int24)"))
+LOG_RANGE = 1_000   # blocks per get_logs when catching up
+
+def _topic_int24(topic) -> int:
+    return abi_decode(["int24"], bytes(topic))[0]
+
+class LiquidityBook:
+    """Live tick liquidity of one pool: one full snapshot, then pool logs applied block by block.
+
+    Each :meth:`update` costs a block number and one get_logs per LOG_RANGE
+    blocks, however many ticks the pool has. Mint/Burn move liquidityGross /
+    liquidityNet at their ticks (a tick disappears when its gross reaches 0),
+    Swap moves the price.
+    """
+
+    def __init__(self, w3: Web3, pool_addr: str, block="latest", min_tick=MIN_TICK, max_tick=MAX_TICK):
+        self.w3 = w3
+        self.pool = pool_addr
+        self.min_tick, self.max_tick = min_tick, max_tick
+        self.ticks, self.state = fetch_tick_state(w3, pool_addr, block, min_tick, max_tick)
+
+    @property
+    def block(self) -> int:
+        return self.state["block"]
+
+    def apply_log(self, log):
+        topic0 = Web3.to_hex(log["topics"][0])
+        data = bytes(log["data"])
+        if topic0 == SWAP:
+            _, _, sqrtPriceX96, _, tick = abi_decode(["int256", "int256", "uint160", "uint128", "int24"], data)
+            self.state["sqrtPriceX96"], self.state["curr_tick"] = int(sqrtPriceX96), int(tick)
+            return
+        if topic0 == MINT:
+            amount = abi_decode(["address", "uint128", "uint256", "uint256"], data)[1]
+        elif topic0 == BURN:
+            amount = -abi_decode(["uint128", "uint256", "uint256"], data)[0]
+        else:
+            return
+        if amount == 0:
+            return
+        for t, sign in ((_topic_int24(log["topics"][2]), 1), (_topic_int24(log["topics"][3]), -1)):
+            if not self.min_tick <= t <= self.max_tick:
+                continue    # outside the snapshot window, as in fetch_tick_state
+            rec = self.ticks.setdefault(t, [0, 0])
+            rec[0] += amount
+            rec[1] += sign * amount
+            if rec[0] <= 0:
+                del self.ticks[t]
+
+    def update(self, to_block="latest") -> int:
+        """Apply pool logs up to ``to_block``; returns the number of logs applied."""
+        if not isinstance(to_block, int):
+            to_block = retry_call(lambda: self.w3.eth.block_number)
+        n = 0
+        while self.block < to_block:
+            end = min(self.block + LOG_RANGE, to_block)
+            logs = retry_call(lambda: self.w3.eth.get_logs({
+                "address": self.pool, "fromBlock": self.block + 1, "toBlock": end, "topics": [[MINT, BURN, SWAP]]}))
+            for lg in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+                self.apply_log(lg)
+            n += len(logs)
+            self.state["block"] = end
+        return n
+
+    def snapshot(self) -> tuple[pd.DataFrame, dict]:
+        """Current stair profile and info, in the format of :func:`fetch_liquidity_rows`."""
+        df = stair_rows({t: net for t, (_, net) in self.ticks.items()}, self.state["dec0"], self.state["dec1"])
+        return df, snapshot_info(self.state)
 
 def plot_snapshot(df: pd.DataFrame, info: dict, pool_addr: str, outfile: str | None = None,
                   xlog=True, xlim=None):
@@ -137,7 +294,8 @@ def plot_snapshot(df: pd.DataFrame, info: dict, pool_addr: str, outfile: str | N
     plt.close()
 
 if __name__ == "__main__":
-    w3 = Web3(Web3.HTTPProvider(RPC))
+    # calls pinned to a final block (BLOCK = <number>) are served from the on-disk cache on re-runs
+    w3 = Web3(CachedHTTPProvider(RPC, RpcCache()))
     assert w3.is_connected(), "RPC not reachable"
 
     df, info = fetch_liquidity_rows(w3, POOL, block=BLOCK)
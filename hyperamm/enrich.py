@@ -0,0 +1,135 @@
+# enrich.py
+# Swap enrichment in one columnar pass: gas join, execution price, gas in quote
+# token, effective price, side and pool price before/after each swap.
+# Streams pool_events + tx_costs (CSV or the Parquet store) in block-ordered chunks.
+# pip install numpy pandas pyarrow
+
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from pricing import BIG_COLUMNS, sqrt_price_to_price, to_float
+
+CHUNK_ROWS = 1_000_000
+NATIVE_DECIMALS = 18    # gas is paid in HYPE
+
+EVENT_COLUMNS = ["event", "tx_hash", "block", "timestamp", "log_index", "sender", "recipient",
+                 "amount0", "amount1", "sqrtPriceX96", "tick"]
+TX_COLUMNS = ["tx_hash", "block", "gasPaidWei"]
+
+
+def iter_batches(path, columns=None, chunk_rows=CHUNK_ROWS):
+    """Record batches of a CSV, a Parquet file or a pool_store table directory, in file (block) order."""
+    path = str(path)
+    if path.endswith(".csv"):
+        from pyarrow import csv
+        with open(path, "r", encoding="utf-8") as f:
+            header = f.readline().strip().split(",")
+        convert = csv.ConvertOptions(column_types={c: pa.string() for c in BIG_COLUMNS if c in header},
+                                     include_columns=[c for c in columns if c in header] if columns else None)
+        read = csv.ReadOptions(block_size=chunk_rows * 256)     # ~chunk_rows rows of pool_events.csv
+        with csv.open_csv(path, read_options=read, convert_options=convert) as reader:
+            yield from reader
+        return
+    if os.path.isdir(path):
+        # pool_store layout: date=YYYYMMDD/part-<from>-<to>.parquet, ordered by first block
+        files = sorted(glob.glob(os.path.join(path, "date=*", "part-*.parquet")),
+                       key=lambda p: int(os.path.basename(p).split("-")[1]))
+    else:
+        files = [path]
+    for p in files:
+        f = pq.ParquetFile(p)
+        cols = [c for c in columns if c in f.schema_arrow.names] if columns else None
+        yield from f.iter_batches(batch_size=chunk_rows, columns=cols)
+
+
+def enrich_swaps(swaps, gas_paid_wei, dec0, dec1, price_before=np.nan):
+    """Enriched DataFrame for one block-ordered chunk of Swap rows.
+
+    ``swaps`` is an Arrow table/batch or DataFrame with the raw event columns,
+    ``gas_paid_wei`` the tx gas of each row (NaN when unknown; a tx's gas is
+    attributed to each of its swaps). ``price_before`` is the pool price after
+    the last swap of the previous chunk.
+    """
+    if isinstance(swaps, (pa.Table, pa.RecordBatch)):
+        raw = {c: swaps.column(c) for c in ("amount0", "amount1", "sqrtPriceX96")}
+        out = swaps.select([c for c in swaps.schema.names if c not in BIG_COLUMNS and c != "event"]).to_pandas()
+    else:
+        raw = {c: swaps[c] for c in ("amount0", "amount1", "sqrtPriceX96")}
+        out = swaps.drop(columns=[c for c in (*BIG_COLUMNS, "event") if c in swaps]).reset_index(drop=True)
+    a0 = to_float(raw["amount0"], dec0)
+    a1 = to_float(raw["amount1"], dec1)
+    out["datetime"] = pd.to_datetime(out["timestamp"], unit="s", utc=True)
+    out["amount0"], out["amount1"] = a0, a1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exec_price = np.where(a0 != 0, np.abs(a1 / a0), np.nan)
+        gas_native = np.asarray(gas_paid_wei, dtype=np.float64) / 10.0 ** NATIVE_DECIMALS
+        gas_quote = gas_native * exec_price
+        effective = np.where(np.isnan(gas_quote), exec_price, np.abs((a1 + gas_quote) / a0))
+    out["exec_price"] = exec_price
+    out["gas_paid_native"] = gas_native
+    out["gas_quote"] = gas_quote
+    out["effective_price"] = np.where(a0 != 0, effective, np.nan)
+    # token0 into the pool = selling token0 (HYPE); out of the pool = buying it
+    out["side"] = pd.Categorical(np.select([a0 > 0, a0 < 0], ["sell", "buy"], "unknown"),
+                                 categories=["buy", "sell", "unknown"])
+    after = sqrt_price_to_price(raw["sqrtPriceX96"], dec0, dec1)
+    out["pool_price_after"] = after
+    out["pool_price_before"] = np.concatenate([[price_before], after[:-1]])
+    return out
+
+
+def stream_enriched(events_path, tx_costs_path, dec0, dec1, chunk_rows=CHUNK_ROWS):
+    """Yield enriched DataFrames chunk by chunk over block-ordered events and tx costs.
+
+    Both inputs are read in block order (pool_events.csv / tx_costs.csv or the
+    pool_store ``events`` / ``tx_costs`` directories) and merge-joined on the
+    fly, so memory stays at about one chunk of each whatever the time span.
+    """
+    tx_batches = iter_batches(tx_costs_path, TX_COLUMNS, chunk_rows)
+    tx_buffer = pd.DataFrame({"tx_hash": pd.Series(dtype=object), "block": pd.Series(dtype=np.int64),
+                              "gasPaidWei": pd.Series(dtype=np.float64)})
+    tx_done = False
+    last_price = np.nan
+    for batch in iter_batches(events_path, EVENT_COLUMNS, chunk_rows):
+        swaps = pa.Table.from_batches([batch]).filter(pc.equal(batch.column("event"), "Swap"))
+        if not swaps.num_rows:
+            continue
+        hi = pc.max(swaps.column("block")).as_py()
+        while not tx_done and (tx_buffer.empty or tx_buffer["block"].iloc[-1] <= hi):
+            nxt = next(tx_batches, None)
+            if nxt is None:
+                tx_done = True
+            else:
+                # wei as decimal strings in the store (int64 in older parts and CSVs)
+                nxt_df = nxt.to_pandas()
+                nxt_df["gasPaidWei"] = to_float(nxt.column("gasPaidWei"))
+                tx_buffer = pd.concat([tx_buffer, nxt_df], ignore_index=True)
+        gas = (pd.Series(swaps.column("tx_hash").to_pandas(), dtype=object)
+               .map(tx_buffer.drop_duplicates("tx_hash").set_index("tx_hash")["gasPaidWei"]))
+        out = enrich_swaps(swaps, gas.to_numpy(np.float64, na_value=np.nan), dec0, dec1, last_price)
+        last_price = out["pool_price_after"].iloc[-1]
+        # later chunks can still hold swaps of block ``hi``
+        tx_buffer = tx_buffer[tx_buffer["block"] >= hi].reset_index(drop=True)
+        yield out
+
+
+def write_enriched(events_path, tx_costs_path, out_path, dec0, dec1, chunk_rows=CHUNK_ROWS):
+    """Stream the enriched swaps into one Parquet file; returns the row count."""
+    writer, n = None, 0
+    try:
+        for df in stream_enriched(events_path, tx_costs_path, dec0, dec1, chunk_rows):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+                writer = pq.ParquetWriter(out_path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            n += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
@@ -1,11 +1,20 @@
-# pip install web3 pandas
-from web3 import Web3
+# pip install web3 aiohttp pyarrow
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
 from web3._utils.events import get_event_data
 from datetime import datetime, timezone
-import pandas as pd
-import time
+import aiohttp
+import asyncio
+import collections
 import os
 
+from rpc import (TokenBucket, async_batch_call, async_retry_call, retry_call, balance_of_call, hex_int,
+                 is_range_too_large, is_retryable)
+from rpc_cache import DEFAULT_PATH, RpcCache, CachedHTTPProvider, CachedAsyncHTTPProvider
+from block_time import BlockTimes
+from reserves import BALANCE_EVENTS, ReserveTracker
+from pool_store import PoolStore
+from liquidity import liquidity_map
+
 # -------------------- CONFIG --------------------
 RPC  = "https://hyperliquid.drpc.org/"      # HyperEVM
 POOL = Web3.to_checksum_address("0x337b56d87a6185cd46af3ac2cdf03cbc37070c30")
@@ -20,11 +29,26 @@ TO_UTC   = "2025-06-10 19:00:00"  # 1 hour window
 # Which events to pull (start with only "Swap" for speed)
 SCAN_TOPICS = ["Swap", "Mint", "Burn", "Initialize"]  # add Mint/Burn/Initialize to locate v3 liquidity ranges
 
-CHUNK = 100  # Small chunks to stay under rate limit
-DELAY_BETWEEN_CHUNKS = 1.0  # 1 second between chunks (60 chunks per minute max)
+CHUNK = 100          # initial get_logs range; grows while responses are small, halves on "too many results"
+MAX_CHUNK = 10_000   # largest range asked for in one get_logs
+TARGET_LOGS = 1_000  # keep growing the range while a response has fewer logs than this
+REQUESTS_PER_SEC = 1.6  # provider limit shared by all in-flight calls (100 req/min ~ 1.67 req/sec)
+MAX_IN_FLIGHT = 8       # block ranges scanned concurrently
+BATCH_SIZE = 25         # tx/receipt/block lookups per JSON-RPC batch request
+RPC_CACHE_PATH = DEFAULT_PATH  # on-disk cache of immutable RPC responses; None to disable
+
+# Pool reserves: "events" rolls balances forward from Swap/Mint/Collect/Flash amounts (per log, exact);
+# "balanceOf" queries both token balances at every block with a scanned tx (end-of-block values).
+RESERVES = "events"
+RESERVE_CHECK_BLOCKS = 5_000  # "events" mode: compare with balanceOf about this often and resync on drift
+
+# Output: append-only Parquet parts + checkpoint under OUT_DIR; re-running resumes/extends the scan
+OUT_DIR = os.path.join("data", "pool_data")
+FLUSH_BLOCKS = 5_000  # write scanned ranges out (and checkpoint) at least every this many blocks
 # ------------------------------------------------
 
-w3 = Web3(Web3.HTTPProvider(RPC))
+rpc_cache = RpcCache(RPC_CACHE_PATH) if RPC_CACHE_PATH else None
+w3 = Web3(CachedHTTPProvider(RPC, rpc_cache) if rpc_cache else Web3.HTTPProvider(RPC))
 
 # ---------- Minimal ABIs ----------
 ERC20_ABI = [
@@ -56,29 +80,36 @@ POOL_ABI = [
         {"indexed":False,"internalType":"int24","name":"tick","type":"int24"}],
      "name":"Swap","type":"event"},
     {"anonymous":False,"inputs":[
-        {"indexed":True,"internalType":"address","name":"sender","type":"address"},
+        {"indexed":False,"internalType":"address","name":"sender","type":"address"},
         {"indexed":True,"internalType":"address","name":"owner","type":"address"},
-        {"indexed":False,"internalType":"int24","name":"tickLower","type":"int24"},
-        {"indexed":False,"internalType":"int24","name":"tickUpper","type":"int24"},
+        {"indexed":True,"internalType":"int24","name":"tickLower","type":"int24"},
+        {"indexed":True,"internalType":"int24","name":"tickUpper","type":"int24"},
         {"indexed":False,"internalType":"uint128","name":"amount","type":"uint128"},
         {"indexed":False,"internalType":"uint256","name":"amount0","type":"uint256"},
         {"indexed":False,"internalType":"uint256","name":"amount1","type":"uint256"}],
      "name":"Mint","type":"event"},
     {"anonymous":False,"inputs":[
         {"indexed":True,"internalType":"address","name":"owner","type":"address"},
-        {"indexed":True,"internalType":"address","name":"recipient","type":"address"},
-        {"indexed":False,"internalType":"int24","name":"tickLower","type":"int24"},
-        {"indexed":False,"internalType":"int24","name":"tickUpper","type":"int24"},
+        {"indexed":True,"internalType":"int24","name":"tickLower","type":"int24"},
+        {"indexed":True,"internalType":"int24","name":"tickUpper","type":"int24"},
         {"indexed":False,"internalType":"uint128","name":"amount","type":"uint128"},
         {"indexed":False,"internalType":"uint256","name":"amount0","type":"uint256"},
         {"indexed":False,"internalType":"uint256","name":"amount1","type":"uint256"}],
      "name":"Burn","type":"event"},
+    {"anonymous":False,"inputs":[
+        {"indexed":True,"internalType":"address","name":"owner","type":"address"},
+        {"indexed":False,"internalType":"address","name":"recipient","type":"address"},
+        {"indexed":True,"internalType":"int24","name":"tickLower","type":"int24"},
+        {"indexed":True,"internalType":"int24","name":"tickUpper","type":"int24"},
+        {"indexed":False,"internalType":"uint128","name":"amount0","type":"uint128"},
+        {"indexed":False,"internalType":"uint128","name":"amount1","type":"uint128"}],
+     "name":"Collect","type":"event"},
     {"anonymous":False,"inputs":[
         {"indexed":True,"internalType":"address","name":"sender","type":"address"},
         {"indexed":True,"internalType":"address","name":"recipient","type":"address"},
-        {"indexed":False,"internalType":"uint256","name":"amount0","type":"uint256"},
-        {"indexed":False,"internalType":"uint256","name":"amount1","type":"uint256"}],
-     "name":"Collect","type":"event"},
+        {"indexed":False,"internalType":"uint128","name":"amount0","type":"uint128"},
+        {"indexed":False,"internalType":"uint128","name":"amount1","type":"uint128"}],
+     "name":"CollectProtocol","type":"event"},
     {"anonymous":False,"inputs":[
         {"indexed":True,"internalType":"address","name":"sender","type":"address"},
         {"indexed":True,"internalType":"address","name":"recipient","type":"address"},
@@ -96,20 +127,11 @@ POOL_ABI = [
 pool = w3.eth.contract(address=POOL, abi=POOL_ABI)
 
 # ---------- sanity checks ----------
-def retry_call(func, max_retries=5, initial_delay=1.0):
-    """Wrapper to retry any RPC call with exponential backoff"""
-    retry_delay = initial_delay
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except Exception as e:
-            if "rate limited" in str(e).lower() and attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                raise
-
 chain_id = retry_call(lambda: w3.eth.chain_id)
+if rpc_cache:
+    # key cached responses by the chain actually served, and learn which blocks are final
+    rpc_cache.chain_id = chain_id
+    rpc_cache.set_head(retry_call(lambda: w3.eth.block_number))
 code = retry_call(lambda: w3.eth.get_code(POOL))
 assert code not in (b"", b"\x00"), "POOL is not a contract on this chain/RPC"
 
@@ -131,65 +153,27 @@ sym0, dec0 = erc20_meta(TOKEN0)
 sym1, dec1 = erc20_meta(TOKEN1)
 price1_per_0 = (sqrtP * sqrtP) / (1 << 192) * (10 ** (dec0 - dec1))
 
-# ---------- Get pool reserves ----------
-# Query the actual token balances held by the pool at a specific block
-def get_pool_reserves(block_number=None):
-    """Get the token reserves in the pool at a specific block (or latest if None)"""
-    erc20_balance_abi = [{
-        "constant": True,
-        "inputs": [{"name": "_owner", "type": "address"}],
-        "name": "balanceOf",
-        "outputs": [{"name": "balance", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    }]
-    
-    # Use the module-level TOKEN0 and TOKEN1 constants
-    addr0 = Web3.to_checksum_address(TOKEN0)
-    addr1 = Web3.to_checksum_address(TOKEN1)
-    token0_contract = w3.eth.contract(address=addr0, abi=erc20_balance_abi)
-    token1_contract = w3.eth.contract(address=addr1, abi=erc20_balance_abi)
-    
-    # If block_number specified, query historical state
-    if block_number:
-        balance0_raw = retry_call(lambda: token0_contract.functions.balanceOf(POOL).call(block_identifier=block_number))
-        time.sleep(0.6)  # Rate limiting
-        balance1_raw = retry_call(lambda: token1_contract.functions.balanceOf(POOL).call(block_identifier=block_number))
-    else:
-        balance0_raw = retry_call(lambda: token0_contract.functions.balanceOf(POOL).call())
-        time.sleep(0.6)  # Rate limiting
-        balance1_raw = retry_call(lambda: token1_contract.functions.balanceOf(POOL).call())
-    
-    # Convert to human-readable amounts
-    balance0 = balance0_raw / (10 ** dec0)
-    balance1 = balance1_raw / (10 ** dec1)
-    
-    return balance0, balance1, balance0_raw, balance1_raw
-
 # ---------- event topics ----------
-def sig(s): return w3.keccak(text=s).hex()
+def sig(s): return Web3.to_hex(w3.keccak(text=s))
 ALL_TOPICS = {
     "Swap": sig("Swap(address,address,int256,int256,uint160,uint128,int24)"),
     "Mint": sig("Mint(address,address,int24,int24,uint128,uint256,uint256)"),
-    "Burn": sig("Burn(address,address,int24,int24,uint128,uint256,uint256)"),
-    "Collect": sig("Collect(address,address,uint256,uint256)"),
+    "Burn": sig("Burn(address,int24,int24,uint128,uint256,uint256)"),
+    "Collect": sig("Collect(address,address,int24,int24,uint128,uint128)"),
+    "CollectProtocol": sig("CollectProtocol(address,address,uint128,uint128)"),
     "Flash": sig("Flash(address,address,uint256,uint256,uint256,uint256)"),
     "Initialize": sig("Initialize(uint160,int24)"),
 }
 SCAN_TOPIC_HASHES = [ALL_TOPICS[n] for n in SCAN_TOPICS]
+TOPIC_NAMES = {v: k for k, v in ALL_TOPICS.items()}
 
 # ---------- block helpers (optional) ----------
-def block_ts(b): return w3.eth.get_block(b).timestamp
-
-def block_for_time(ts_utc: int, lo=1, hi=None):
-    if hi is None: hi = w3.eth.block_number
-    while lo < hi:
-        mid = (lo + hi) // 2
-        if block_ts(mid) < ts_utc:
-            lo = mid + 1
-        else:
-            hi = mid
-    return lo
+# timestamp -> block by interpolation search; every block timestamp seen is kept in the cache db
+block_times = BlockTimes(w3, rpc_cache)
+
+def block_ts(b): return block_times.timestamp(b)
+
+def block_for_time(ts_utc: int, lo=1, hi=None): return block_times.block_for_time(ts_utc, lo, hi)
 
 if FROM_BLOCK is None or TO_BLOCK is None:
     if FROM_UTC and TO_UTC:
@@ -207,189 +191,286 @@ event_abi_by_name = {e["name"]: e for e in POOL_ABI if e.get("type")=="event"}
 decoders = {name: (lambda log, abi=event_abi_by_name[name]: get_event_data(w3.codec, abi, log)) for name in event_abi_by_name}
 
 def effective_gas_price(rcpt, tx):
-    return rcpt.get("effectiveGasPrice") or tx.get("gasPrice", 0)
+    return hex_int(rcpt.get("effectiveGasPrice") or tx.get("gasPrice")) or 0
+
+# ---------- batched tx resolution ----------
+async def resolve_txs(tx_hashes, session, limiter, reserves=True):
+    """Fetch tx, receipt, block timestamp and (with ``reserves``) post-block pool reserves for many txs.
+
+    Everything goes out as JSON-RPC batches: one round for txs + receipts, one for
+    the balanceOf calls of the distinct blocks they landed in (plus get_block for
+    blocks whose timestamp is not in the block-time index yet).
+    """
+    hexes = [Web3.to_hex(h) for h in tx_hashes]
+    calls = [("eth_getTransactionByHash", [h]) for h in hexes]
+    calls += [("eth_getTransactionReceipt", [h]) for h in hexes]
+    res = await async_batch_call(RPC, calls, session, limiter, batch_size=BATCH_SIZE, cache=rpc_cache)
+    txs, rcpts = res[:len(hexes)], res[len(hexes):]
+
+    blocks = sorted({hex_int(rc["blockNumber"]) for rc in rcpts})
+    ts_by_block = block_times.index.get_many(blocks)
+    missing = [b for b in blocks if b not in ts_by_block]
+    calls = [("eth_getBlockByNumber", [hex(b), False]) for b in missing]
+    if reserves:
+        calls += [balance_of_call(TOKEN0, POOL, b) for b in blocks]
+        calls += [balance_of_call(TOKEN1, POOL, b) for b in blocks]
+    res = await async_batch_call(RPC, calls, session, limiter, batch_size=BATCH_SIZE, cache=rpc_cache)
+    fetched = [(b, hex_int(res[i]["timestamp"])) for i, b in enumerate(missing)]
+    block_times.index.put_many(fetched)
+    ts_by_block.update(fetched)
+    m, n = len(missing), len(blocks)
+    by_block = {
+        b: (ts_by_block[b], hex_int(res[m + i]) / (10 ** dec0), hex_int(res[m + n + i]) / (10 ** dec1))
+        if reserves else (ts_by_block[b], None, None)
+        for i, b in enumerate(blocks)
+    }
+
+    out = {}
+    for txh, tx, rc in zip(tx_hashes, txs, rcpts):
+        block = hex_int(rc["blockNumber"])
+        ts, reserve0_after, reserve1_after = by_block[block]
+        gas_used = hex_int(rc["gasUsed"])
+        out[txh] = {
+            "tx_hash": txh.hex(),
+            "from": Web3.to_checksum_address(tx["from"]),
+            "block": block,
+            "timestamp": ts,
+            "gasUsed": gas_used,
+            "effectiveGasPrice": effective_gas_price(rc, tx),
+            "gasPaidWei": gas_used * effective_gas_price(rc, tx),
+            "status": hex_int(rc["status"]),
+            "reserve0_after": reserve0_after,
+            "reserve1_after": reserve1_after,
+        }
+    return out
 
 # ---------- scanner (topic-filtered) ----------
-def scan_pool_events(from_b, to_b, topic_hashes):
+class RangeSizer:
+    """Adaptive get_logs range: doubles while responses stay under TARGET_LOGS, halves on overflow.
+
+    A span that overflowed is not asked for again until responses get sparse
+    (under a quarter of the target), so a busy stretch does not grow/bisect
+    on every range.
+    """
+
+    def __init__(self, size=CHUNK, max_size=MAX_CHUNK, target_logs=TARGET_LOGS):
+        self.size, self.max_size, self.target_logs = size, max_size, target_logs
+        self.overflow_span = max_size + 1
+
+    def observe(self, span, n_logs):
+        if span < self.size:
+            return
+        if n_logs < self.target_logs // 4:
+            self.overflow_span = min(self.max_size + 1, self.overflow_span * 2)
+        if n_logs < self.target_logs // 2 and self.size * 2 < self.overflow_span:
+            self.size = min(self.max_size, self.size * 2)
+
+    def shrink(self, span):
+        self.overflow_span = min(self.overflow_span, span)
+        self.size = max(1, min(self.size, span // 2))
+
+async def get_logs_split(aw3, limiter, sizer, cur, end, topic_hashes):
+    """Logs of [cur, end] for any of ``topic_hashes`` in one call, bisecting when the range is too big."""
+    flt = {"fromBlock": cur, "toBlock": end, "address": POOL, "topics": [topic_hashes]}
+    try:
+        logs = await async_retry_call(lambda: aw3.eth.get_logs(flt), limiter,
+                                      retryable=lambda e: is_retryable(e) and not is_range_too_large(e))
+    except Exception as e:
+        if not is_range_too_large(e):
+            raise
+        if cur == end:
+            # one block cannot be split; a node-side query timeout may still pass on a retry
+            logs = await async_retry_call(lambda: aw3.eth.get_logs(flt), limiter)
+            sizer.observe(1, len(logs))
+            return logs
+        sizer.shrink(end - cur + 1)
+        mid = (cur + end) // 2
+        left, right = await asyncio.gather(get_logs_split(aw3, limiter, sizer, cur, mid, topic_hashes),
+                                           get_logs_split(aw3, limiter, sizer, mid + 1, end, topic_hashes))
+        return left + right
+    sizer.observe(end - cur + 1, len(logs))
+    return logs
+
+async def pool_balances(session, limiter, block):
+    """Raw (balance0, balance1) of the pool after ``block``."""
+    res = await async_batch_call(RPC, [balance_of_call(TOKEN0, POOL, block), balance_of_call(TOKEN1, POOL, block)],
+                                 session, limiter, cache=rpc_cache)
+    return hex_int(res[0]), hex_int(res[1])
+
+async def scan_chunk(aw3, session, limiter, sizer, cur, end, query_hashes, emit):
+    """Decoded logs of one block range in (block, log_index) order, and the costs of txs with ``emit`` events."""
+    chunk_logs = []
+    for lg in await get_logs_split(aw3, limiter, sizer, cur, end, query_hashes):
+        # derive event name from topic
+        name = TOPIC_NAMES.get(Web3.to_hex(lg["topics"][0]))
+        if name:
+            chunk_logs.append((name, decoders[name](lg), lg))
+    chunk_logs.sort(key=lambda x: (x[2]["blockNumber"], x[2]["logIndex"]))
+
+    # resolve every tx of the chunk in a few batch round trips
+    tx_hashes = list(dict.fromkeys(lg["transactionHash"] for name, _, lg in chunk_logs if name in emit))
+    tx_costs = await resolve_txs(tx_hashes, session, limiter, reserves=RESERVES != "events") if tx_hashes else {}
+    return chunk_logs, tx_costs
+
+def event_row(name, ev, lg, tx_cost, before, after):
+    row = {
+        "event": name,
+        "tx_hash": lg["transactionHash"].hex(),
+        "block": lg["blockNumber"],
+        "timestamp": tx_cost["timestamp"],
+        "log_index": lg["logIndex"],
+        "token_0_balance_after": after[0],
+        "token_1_balance_after": after[1],
+    }
+    for k, v in ev["args"].items():
+        row[k] = v.hex() if isinstance(v, bytes) else v
+    row["token_0_balance_before"], row["token_1_balance_before"] = before
+    return row
+
+async def scan_pool_events(from_b, to_b, topic_hashes, store, resume=None):
+    """Scan [from_b, to_b] with up to MAX_IN_FLIGHT block ranges in flight.
+
+    Ranges are cut one after another at the size the RangeSizer currently
+    suggests, and results are consumed in block order. All calls share one
+    token bucket, so the scan runs at REQUESTS_PER_SEC whatever the number
+    of calls in flight.
+
+    With RESERVES = "events", balance-moving events are fetched along with
+    ``topic_hashes`` and the pool balances are rolled forward log by log from
+    balanceOf at ``from_b - 1``; balanceOf is only called again every
+    RESERVE_CHECK_BLOCKS blocks (and at the end) to report and correct drift.
+
+    Consumed ranges are appended to ``store`` every FLUSH_BLOCKS blocks
+    together with a checkpoint holding the next block, the reserve state and
+    the range size, so memory stays flat and an interrupted scan continues
+    from ``resume`` (the last checkpoint) without losing or repeating blocks.
+    Returns the number of events and txs written.
+    """
+    resume = resume or {}
+    limiter = TokenBucket(REQUESTS_PER_SEC)
+    sizer = RangeSizer(size=resume.get("range_size", CHUNK))
+    aw3 = AsyncWeb3(CachedAsyncHTTPProvider(RPC, rpc_cache) if rpc_cache else AsyncHTTPProvider(RPC))
+    latest = await async_retry_call(lambda: aw3.eth.block_number, limiter) if to_b == "latest" else to_b
+    emit = {TOPIC_NAMES[t] for t in topic_hashes}
+    query_hashes = list(topic_hashes)
+    if RESERVES == "events":
+        query_hashes += [ALL_TOPICS[n] for n in BALANCE_EVENTS if ALL_TOPICS[n] not in query_hashes]
+    state = {**SCAN_SETTINGS, "first_block": resume.get("first_block", from_b)}
+    prev_after = tuple(resume.get("last_balances") or (None, None))
     events, tx_costs = [], {}
-    cur = from_b
-    latest = w3.eth.block_number if to_b == "latest" else to_b
-    while cur <= latest:
-        end = min(cur + CHUNK - 1, latest)
-        # fetch per-topic in separate calls (keeps responses small & reliable)
-        total_logs = 0
-        for topic0 in topic_hashes:
-            flt = {
-                "fromBlock": cur,
-                "toBlock": end,
-                "address": POOL,
-                "topics": [topic0]
-            }
-            # Retry logic for rate limiting (100 req/min = ~1.67 req/sec)
-            max_retries = 5
-            retry_delay = 2.0
-            logs = None
-            for attempt in range(max_retries):
-                try:
-                    logs = w3.eth.get_logs(flt)
-                    time.sleep(0.6)  # Rate limiting: ~1.67 req/sec
-                    break
-                except Exception as e:
-                    error_str = str(e).lower()
-                    if ("rate limited" in error_str or "connection" in error_str or "remote" in error_str) and attempt < max_retries - 1:
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
+    n_events = n_txs = 0
+    pending = collections.deque()
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=MAX_IN_FLIGHT)) as session:
+        tracker = None
+        if RESERVES == "events":
+            if resume.get("reserves_raw"):
+                tracker = ReserveTracker(*map(int, resume["reserves_raw"]), from_b - 1)
+            else:
+                tracker = ReserveTracker(*await pool_balances(session, limiter, max(0, from_b - 1)), from_b - 1)
+            last_check = from_b - 1
+        cur = buf_start = from_b
+        try:
+            while cur <= latest or pending:
+                while cur <= latest and len(pending) < MAX_IN_FLIGHT:
+                    end = min(cur + sizer.size - 1, latest)
+                    task = asyncio.ensure_future(scan_chunk(aw3, session, limiter, sizer, cur, end, query_hashes, emit))
+                    pending.append((cur, end, task))
+                    cur = end + 1
+                start, end, task = pending.popleft()
+                chunk_logs, chunk_txs = await task
+                chunk_events = 0
+                for name, ev, lg in chunk_logs:
+                    balances = tracker.apply(name, ev["args"], lg["blockNumber"]) if tracker else None
+                    txh = lg["transactionHash"]
+                    if balances is not None and txh in chunk_txs:
+                        # the tx's reserves after its last pool event, emitted or not
+                        chunk_txs[txh]["reserve0_after"] = balances[2] / (10 ** dec0)
+                        chunk_txs[txh]["reserve1_after"] = balances[3] / (10 ** dec1)
+                    if name not in emit:
+                        continue
+                    if balances is not None:
+                        after = (balances[2] / (10 ** dec0), balances[3] / (10 ** dec1))
+                        before = (balances[0] / (10 ** dec0), balances[1] / (10 ** dec1))
                     else:
-                        raise
-            
-            if logs is None:
-                logs = []
-            
-            total_logs += len(logs)
-            # derive event name from topic
-            name = next((k for k, v in ALL_TOPICS.items() if v == topic0), None)
-            if not name:
-                continue
-            for lg in logs:
-                ev = decoders[name](lg)
-                txh = lg["transactionHash"]
-                if txh not in tx_costs:
-                    # Retry logic for transaction/receipt fetches (100 req/min limit)
-                    max_retries = 5
-                    retry_delay = 2.0
-                    for attempt in range(max_retries):
-                        try:
-                            tx = w3.eth.get_transaction(txh)
-                            time.sleep(0.6)  # Rate limiting
-                            rc = w3.eth.get_transaction_receipt(txh)
-                            time.sleep(0.6)  # Rate limiting
-                            blk = w3.eth.get_block(rc["blockNumber"])
-                            time.sleep(0.6)  # Rate limiting
-                            break
-                        except Exception as e:
-                            error_str = str(e).lower()
-                            if ("rate limited" in error_str or "connection" in error_str or "remote" in error_str) and attempt < max_retries - 1:
-                                time.sleep(retry_delay)
-                                retry_delay *= 2
-                            else:
-                                raise
-                    
-                    # Only get reserves AFTER transaction (before = previous tx's after)
-                    time.sleep(0.6)  # Rate limiting
-                    reserve0_after, reserve1_after, _, _ = get_pool_reserves(rc["blockNumber"])
-                    
-                    tx_costs[txh] = {
-                        "tx_hash": txh.hex(),
-                        "from": tx["from"],
-                        "block": rc["blockNumber"],
-                        "timestamp": blk["timestamp"],
-                        "gasUsed": rc["gasUsed"],
-                        "effectiveGasPrice": effective_gas_price(rc, tx),
-                        "gasPaidWei": rc["gasUsed"] * effective_gas_price(rc, tx),
-                        "status": rc["status"],
-                        "reserve0_after": reserve0_after,
-                        "reserve1_after": reserve1_after,
-                    }
-                    print(f"  Processed tx {len(tx_costs)}: {txh.hex()[:12]}...")
-                    
-                row = {
-                    "event": name,
-                    "tx_hash": txh.hex(),
-                    "block": lg["blockNumber"],
-                    "timestamp": tx_costs[txh]["timestamp"],
-                    "log_index": lg["logIndex"],
-                    "token_0_balance_after": tx_costs[txh]["reserve0_after"],
-                    "token_1_balance_after": tx_costs[txh]["reserve1_after"],
-                }
-                for k, v in ev["args"].items():
-                    row[k] = v.hex() if isinstance(v, bytes) else v
-                events.append(row)
-        print(f"Chunk {cur}-{end}: {total_logs} events, {len(tx_costs)} unique txs so far")
-        time.sleep(DELAY_BETWEEN_CHUNKS)
-        cur = end + 1
-    return events, list(tx_costs.values())
+                        # end-of-block balances; "before" is the previous event's "after"
+                        after = (chunk_txs[txh]["reserve0_after"], chunk_txs[txh]["reserve1_after"])
+                        before = prev_after
+                    prev_after = after
+                    events.append(event_row(name, ev, lg, chunk_txs[txh], before, after))
+                    chunk_events += 1
+                tx_costs.update(chunk_txs)
+                if tracker and (end - last_check >= RESERVE_CHECK_BLOCKS or end == latest):
+                    drift0, drift1 = tracker.check(*await pool_balances(session, limiter, end), end)
+                    if drift0 or drift1:
+                        print(f"[warn] reserve drift by block {end}: token0 {drift0 / 10 ** dec0:+.10g}, "
+                              f"token1 {drift1 / 10 ** dec1:+.10g} (resynced to balanceOf)")
+                    last_check = end
+                if end - buf_start + 1 >= FLUSH_BLOCKS or end == latest:
+                    state.update(range_size=sizer.size, last_balances=list(prev_after),
+                                 reserves_raw=[str(tracker.balance0), str(tracker.balance1)] if tracker else None)
+                    store.append(buf_start, end, events, list(tx_costs.values()), state)
+                    n_events += len(events)
+                    n_txs += len(tx_costs)
+                    events, tx_costs = [], {}
+                    buf_start = end + 1
+                print(f"Blocks {start}-{end}: {chunk_events} events, {n_txs + len(tx_costs)} txs written or buffered "
+                      f"(next range {sizer.size} blocks)")
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+    return n_events, n_txs
 
 # ---------- run ----------
-print(f"Scanning blocks {FROM_BLOCK} to {TO_BLOCK}...")
-events, txs = scan_pool_events(FROM_BLOCK, TO_BLOCK, SCAN_TOPIC_HASHES)
+SCAN_SETTINGS = {"pool": POOL, "scan_topics": SCAN_TOPICS, "reserves": RESERVES}
+store = PoolStore(OUT_DIR)
+checkpoint = store.load_checkpoint()
+if checkpoint:
+    if {k: checkpoint.get(k) for k in SCAN_SETTINGS} != SCAN_SETTINGS:
+        raise SystemExit(f"{OUT_DIR} holds a scan with other settings "
+                         f"({ {k: checkpoint.get(k) for k in SCAN_SETTINGS} }); use a different OUT_DIR")
+    if store.drop_parts_from(checkpoint["next_block"]):
+        print("Removed parts written after the last checkpoint")
+    if FROM_BLOCK < checkpoint["first_block"]:
+        print(f"[warn] {OUT_DIR} starts at block {checkpoint['first_block']}; "
+              f"blocks from {FROM_BLOCK} are not back-filled (use a new OUT_DIR)")
+    scan_from = checkpoint["next_block"]
+    print(f"Resuming {OUT_DIR}: blocks {checkpoint['first_block']}-{scan_from - 1} already scanned")
+else:
+    store.drop_parts_from(0)
+    scan_from = FROM_BLOCK
 
-# ---------- save ----------
-df_events = pd.DataFrame(events).sort_values(["block","log_index"]) if events else pd.DataFrame(events)
-df_txs = pd.DataFrame(txs).sort_values(["block"]) if txs else pd.DataFrame(txs)
+if scan_from <= TO_BLOCK:
+    print(f"Scanning blocks {scan_from} to {TO_BLOCK}...")
+    n_events, n_txs = asyncio.run(scan_pool_events(scan_from, TO_BLOCK, SCAN_TOPIC_HASHES, store, checkpoint))
+else:
+    n_events = n_txs = 0
+    print(f"Nothing to scan: {OUT_DIR} already covers up to block {scan_from - 1}")
 
-# Calculate "before" from previous transaction's "after"
-if not df_events.empty:
-    df_events["token_0_balance_before"] = df_events["token_0_balance_after"].shift(1)
-    df_events["token_1_balance_before"] = df_events["token_1_balance_after"].shift(1)
-    # First transaction has no previous, fill with NaN or query it separately if needed`
-
-out_dir = os.path.join("data", "pool_data")
-os.makedirs(out_dir, exist_ok=True)
+# ---------- save ----------
+# flat CSV copies of the whole dataset, built one part at a time
+store.export_csv("events", os.path.join(OUT_DIR, "pool_events.csv"))
+store.export_csv("tx_costs", os.path.join(OUT_DIR, "tx_costs.csv"))
 
-df_events.to_csv(os.path.join(out_dir, "pool_events.csv"), index=False)
-df_txs.to_csv(os.path.join(out_dir, "tx_costs.csv"), index=False)
+print(f"COMPLETED: events={n_events}, unique_txs={n_txs} this run, saved under {OUT_DIR} "
+      f"(Parquet parts, pool_events.csv & tx_costs.csv)")
+if rpc_cache:
+    print(f"RPC cache: {rpc_cache.hits} hits, {rpc_cache.misses} misses ({rpc_cache.path})")
 
-print(f"COMPLETED: events={len(events)}, unique_txs={len(txs)}, saved to pool_events.csv & tx_costs.csv")
+out_dir = OUT_DIR
+df_events = store.read("events", columns=["event", "tickLower", "tickUpper", "amount"],
+                       events=["Mint", "Burn"])
 
 # ---------- liquidity by tick/range (Uniswap v3-style) ----------
 # Liquidity in v3 is provided between tickLower and tickUpper via Mint/Burn events.
 # We build liquidityNet per tick and then cumulative-sum to get active liquidity by tick.
 try:
-    if not df_events.empty and set(df_events["event"].unique()) & {"Mint", "Burn"}:
-        liq_changes = {}
-        for _, r in df_events.iterrows():
-            if r["event"] == "Mint":
-                tL, tU, amt = int(r["tickLower"]), int(r["tickUpper"]), int(r["amount"])
-                liq_changes[tL] = liq_changes.get(tL, 0) + amt
-                liq_changes[tU] = liq_changes.get(tU, 0) - amt
-            elif r["event"] == "Burn":
-                tL, tU, amt = int(r["tickLower"]), int(r["tickUpper"]), int(r["amount"])
-                # Burn removes liquidity between [tL, tU)
-                liq_changes[tL] = liq_changes.get(tL, 0) - amt
-                liq_changes[tU] = liq_changes.get(tU, 0) + amt
-
-        if liq_changes:
-            ticks_sorted = sorted(liq_changes.keys())
-            active = 0
-            rows_tick = []
-            for tk in ticks_sorted:
-                active += liq_changes[tk]
-                # price of token1 per token0 at this tick
-                # Uniswap v3 tick definition: price = 1.0001**tick * 10**(dec0 - dec1)
-                price_1_per_0 = (1.0001 ** tk) * (10 ** (dec0 - dec1))
-                rows_tick.append({
-                    "tick": tk,
-                    "active_liquidity": active,
-                    "price1_per_0": price_1_per_0,
-                })
-            df_liq_ticks = pd.DataFrame(rows_tick)
-            df_liq_ticks.to_csv(os.path.join(out_dir, "liquidity_by_tick.csv"), index=False)
-
-            # Also derive contiguous ranges between successive ticks with constant liquidity
-            rows_ranges = []
-            for i in range(len(ticks_sorted) - 1):
-                tL = ticks_sorted[i]
-                tU = ticks_sorted[i + 1]
-                # active liquidity after applying change at tL
-                # find active_liquidity at tL in df_liq_ticks
-                active_here = int(df_liq_ticks.loc[df_liq_ticks.tick == tL, "active_liquidity"].iloc[0])
-                p_low = (1.0001 ** tL) * (10 ** (dec0 - dec1))
-                p_high = (1.0001 ** tU) * (10 ** (dec0 - dec1))
-                rows_ranges.append({
-                    "tickLower": tL,
-                    "tickUpper": tU,
-                    "active_liquidity": active_here,
-                    "price_low_1_per_0": p_low,
-                    "price_high_1_per_0": p_high,
-                })
-            df_liq_ranges = pd.DataFrame(rows_ranges)
-            df_liq_ranges = df_liq_ranges.sort_values("active_liquidity", ascending=False)
-            df_liq_ranges.to_csv(os.path.join(out_dir, "liquidity_ranges_top.csv"), index=False)
-
-            print("Liquidity by tick saved to liquidity_by_tick.csv")
-            print("Top ranges (by active liquidity) saved to liquidity_ranges_top.csv")
-        else:
-            print("No Mint/Burn-derived liquidity changes found in the selected window.")
+    if not df_events.empty:
+        df_liq_ticks, df_liq_ranges = liquidity_map(df_events, dec0, dec1)
+        df_liq_ticks.to_csv(os.path.join(out_dir, "liquidity_by_tick.csv"), index=False)
+        df_liq_ranges.to_csv(os.path.join(out_dir, "liquidity_ranges_top.csv"), index=False)
+        print("Liquidity by tick saved to liquidity_by_tick.csv")
+        print("Top ranges (by active liquidity) saved to liquidity_ranges_top.csv")
     else:
         print("Mint/Burn events not present in df_events — update SCAN_TOPICS to include 'Mint' and 'Burn' and rescan.")
 except Exception as e:
@@ -0,0 +1,56 @@
+# liquidity.py
+# Uniswap v3 liquidity map from Mint/Burn events: liquidityNet per tick, active
+# liquidity by tick and the constant-liquidity "stair" intervals between ticks.
+# pip install numpy pandas
+
+import numpy as np
+import pandas as pd
+
+import bigint
+
+
+def tick_price(ticks, dec0, dec1):
+    """Price of token1 per token0 at each tick: 1.0001**tick * 10**(dec0 - dec1)."""
+    return np.power(1.0001, np.asarray(ticks, dtype=np.float64)) * (10 ** (dec0 - dec1))
+
+
+def liquidity_net(events):
+    """(ticks, liquidityNet limbs) from rows with event, tickLower, tickUpper, amount.
+
+    Mint adds ``amount`` at tickLower and removes it at tickUpper, Burn does the
+    opposite; other events are ignored. ``amount`` may be ints or decimal
+    strings (as stored by pool_store) and is summed exactly as bigint limbs.
+    """
+    ev = events[events["event"].isin(["Mint", "Burn"])]
+    amount = bigint.from_strings(ev["amount"].astype(str).to_numpy())
+    amount[(ev["event"] == "Burn").to_numpy()] *= -1
+    ticks = np.concatenate([ev["tickLower"].to_numpy(np.int64), ev["tickUpper"].to_numpy(np.int64)])
+    return bigint.group_sum(ticks, np.concatenate([amount, -amount]))
+
+
+def liquidity_map(events, dec0, dec1):
+    """(ticks, ranges) DataFrames of the liquidity map built from Mint/Burn events.
+
+    ``ticks``: tick, liquidity_net, active_liquidity (active from that tick up
+    to the next one), price1_per_0. ``ranges``: one row per interval between
+    successive ticks, sorted by active liquidity, largest first. Liquidity
+    columns are exact decimal strings.
+    """
+    ticks, net = liquidity_net(events)
+    active = bigint.cumsum(net)
+    price = tick_price(ticks, dec0, dec1)
+    df_ticks = pd.DataFrame({
+        "tick": ticks,
+        "liquidity_net": bigint.to_strings(net),
+        "active_liquidity": bigint.to_strings(active),
+        "price1_per_0": price,
+    })
+    df_ranges = pd.DataFrame({
+        "tickLower": ticks[:-1],
+        "tickUpper": ticks[1:],
+        "active_liquidity": df_ticks["active_liquidity"].to_numpy()[:-1],
+        "price_low_1_per_0": price[:-1],
+        "price_high_1_per_0": price[1:],
+    })
+    order = bigint.argsort(active[:-1], descending=True)
+    return df_ticks, df_ranges.iloc[order].reset_index(drop=True)
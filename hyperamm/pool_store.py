@@ -0,0 +1,171 @@
+# pool_store.py
+# Append-only, date-partitioned Parquet store for scanned pool events and tx costs,
+# with the scan checkpoint that lets hyperswap_pool_data.py resume.
+# pip install pyarrow pandas
+
+import glob
+import json
+import os
+from datetime import datetime, timezone
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHECKPOINT_NAME = "_scan_checkpoint.json"
+
+# uint256/int256/uint160/uint128 values (and gas * price in wei) do not fit int64: stored as decimal strings
+BIG_INT_COLUMNS = ("amount0", "amount1", "sqrtPriceX96", "liquidity", "amount", "paid0", "paid1", "gasPaidWei")
+
+EVENT_SCHEMA = pa.schema([
+    ("event", pa.string()),
+    ("tx_hash", pa.string()),
+    ("block", pa.int64()),
+    ("timestamp", pa.int64()),
+    ("log_index", pa.int64()),
+    ("token_0_balance_after", pa.float64()),
+    ("token_1_balance_after", pa.float64()),
+    ("sender", pa.string()),
+    ("recipient", pa.string()),
+    ("owner", pa.string()),
+    ("amount0", pa.string()),
+    ("amount1", pa.string()),
+    ("sqrtPriceX96", pa.string()),
+    ("liquidity", pa.string()),
+    ("tick", pa.int32()),
+    ("tickLower", pa.int32()),
+    ("tickUpper", pa.int32()),
+    ("amount", pa.string()),
+    ("paid0", pa.string()),
+    ("paid1", pa.string()),
+    ("token_0_balance_before", pa.float64()),
+    ("token_1_balance_before", pa.float64()),
+])
+
+TX_SCHEMA = pa.schema([
+    ("tx_hash", pa.string()),
+    ("from", pa.string()),
+    ("block", pa.int64()),
+    ("timestamp", pa.int64()),
+    ("gasUsed", pa.int64()),
+    ("effectiveGasPrice", pa.int64()),
+    ("gasPaidWei", pa.string()),
+    ("status", pa.int64()),
+    ("reserve0_after", pa.float64()),
+    ("reserve1_after", pa.float64()),
+])
+
+SCHEMAS = {"events": EVENT_SCHEMA, "tx_costs": TX_SCHEMA}
+
+# keep integer columns integral (blank, not NaN-float, where an event lacks the field)
+_PANDAS_TYPES = {pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype()}.get
+
+
+def _date(ts):
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _part_start(path):
+    # part-<from>-<to>.parquet
+    return int(os.path.basename(path).split("-")[1])
+
+
+class PoolStore:
+    """Scanned block ranges under ``root``: ``<table>/date=YYYYMMDD/part-<from>-<to>.parquet``.
+
+    Parts are only ever added. The checkpoint records the next block to scan
+    (plus scan settings and reserve state) and is written after the parts of a
+    range, so parts past the checkpoint are leftovers of an interrupted run.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.checkpoint_path = os.path.join(root, CHECKPOINT_NAME)
+
+    # ---------- checkpoint ----------
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_checkpoint(self, state):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.checkpoint_path)
+
+    def parts(self, table):
+        """Part files of a table in block order."""
+        return sorted(glob.glob(os.path.join(self.root, table, "date=*", "part-*.parquet")), key=_part_start)
+
+    def drop_parts_from(self, block):
+        """Remove parts starting at or after ``block`` (written after the last checkpoint)."""
+        removed = 0
+        for table in SCHEMAS:
+            for p in self.parts(table):
+                if _part_start(p) >= block:
+                    os.remove(p)
+                    removed += 1
+        return removed
+
+    # ---------- writing ----------
+    def _write(self, table, rows, start, end):
+        by_date = {}
+        for r in rows:
+            # converted copies: the caller's rows keep their ints
+            big = {c: str(r[c]) for c in BIG_INT_COLUMNS if r.get(c) is not None}
+            by_date.setdefault(_date(r["timestamp"]), []).append({**r, **big} if big else r)
+        out = []
+        for date, part_rows in by_date.items():
+            path = os.path.join(self.root, table, f"date={date}", f"part-{start:010d}-{end:010d}.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # dot-prefixed so a leftover temp file is never picked up as a part
+            tmp = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+            pq.write_table(pa.Table.from_pylist(part_rows, schema=SCHEMAS[table]), tmp, compression="zstd")
+            os.replace(tmp, path)
+            out.append(path)
+        return out
+
+    def append(self, start, end, events, tx_costs, state):
+        """Write blocks [start, end] and move the checkpoint past them."""
+        written = self._write("events", events, start, end) + self._write("tx_costs", tx_costs, start, end)
+        self.save_checkpoint({**state, "next_block": end + 1})
+        return written
+
+    # ---------- reading ----------
+    def dataset(self, table):
+        import pyarrow.dataset as ds
+        return ds.dataset(os.path.join(self.root, table), format="parquet", schema=SCHEMAS[table],
+                          partitioning="hive")
+
+    def read(self, table, columns=None, events=None):
+        """Whole table as a pandas DataFrame in block order.
+
+        ``columns`` and ``events`` (event names, events table only) are pushed
+        down to the Parquet scan, so only what is asked for is loaded.
+        """
+        if not self.parts(table):
+            t = pa.Table.from_pylist([], schema=SCHEMAS[table])
+            return t.select(columns or t.column_names).to_pandas(types_mapper=_PANDAS_TYPES)
+        import pyarrow.dataset as ds
+        flt = ds.field("event").isin(list(events)) if events is not None else None
+        t = self.dataset(table).to_table(columns=columns, filter=flt)
+        df = t.to_pandas(types_mapper=_PANDAS_TYPES)
+        order = [c for c in ("block", "log_index") if c in df]
+        return df.sort_values(order, kind="stable").reset_index(drop=True) if order else df
+
+    def export_csv(self, table, path):
+        """Concatenate a table's parts into one CSV, one part in memory at a time."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        header = True
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            for p in self.parts(table):
+                df = pq.read_table(p, schema=SCHEMAS[table]).to_pandas(types_mapper=_PANDAS_TYPES)
+                df.to_csv(f, index=False, header=header)
+                header = False
+            if header:
+                f.write(",".join(SCHEMAS[table].names) + "\n")
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,122 @@
+# pricing.py
+# Decimal-adjusted float64 prices and amounts from the raw pool event columns
+# (sqrtPriceX96, amount0/1, liquidity, tick) of pool_events.csv or the Parquet store.
+# pip install numpy pandas pyarrow
+
+from fractions import Fraction
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+Q96 = 2 ** 96
+
+# uint160/int256/uint128: too large for int64, kept as decimal strings until decoded
+BIG_COLUMNS = ("sqrtPriceX96", "amount0", "amount1", "liquidity")
+
+
+def read_events(path, columns=None, events=("Swap",)):
+    """Arrow table of pool events from a CSV, a Parquet file or a pool_store ``events`` directory.
+
+    Big-integer columns are read as strings (never as lossy floats or Python
+    ints); ``events`` keeps only those event names (None for all).
+    """
+    if columns is not None and events is not None and "event" not in columns:
+        columns = ["event", *columns]
+    if str(path).endswith(".csv"):
+        from pyarrow import csv
+        with open(path, "r", encoding="utf-8") as f:
+            header = f.readline().strip().split(",")
+        types = {c: pa.string() for c in BIG_COLUMNS if c in header}
+        table = csv.read_csv(path, convert_options=csv.ConvertOptions(column_types=types, include_columns=columns))
+    else:
+        import pyarrow.dataset as ds
+        table = ds.dataset(path, format="parquet", partitioning="hive").to_table(columns=columns)
+    if events is not None:
+        table = table.filter(pc.is_in(table["event"], pa.array(list(events))))
+    return table
+
+
+def _arrow(values):
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return values.cast(pa.string())
+    values = pd.Series(values)
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        return pa.array(values.astype("string"), type=pa.string())
+    return pa.array(values.astype(np.float64))     # already numeric (e.g. pandas' float parse of a CSV)
+
+
+def to_float(values, decimals=0):
+    """float64 of a big-integer column divided by 10**decimals; missing values give NaN.
+
+    Decimal strings are parsed by Arrow, correctly rounded and vectorized, so
+    there is no int64 overflow and no per-row Python int.
+    """
+    arr = _arrow(values)
+    out = pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+    return out / 10.0 ** decimals if decimals else out
+
+
+def sqrt_price_to_price(sqrt_price_x96, dec0, dec1):
+    """Price of token1 per token0: (sqrtPriceX96 / 2**96)**2 * 10**(dec0 - dec1)."""
+    s = to_float(sqrt_price_x96) / Q96
+    return s * s * 10.0 ** (dec0 - dec1)
+
+
+def tick_to_price(tick, dec0, dec1):
+    return np.power(1.0001, np.asarray(tick, dtype=np.float64)) * 10.0 ** (dec0 - dec1)
+
+
+def _column(events, name):
+    return events[name] if name in (events.column_names if isinstance(events, pa.Table) else events.columns) else None
+
+
+def decode_events(events, dec0, dec1):
+    """DataFrame of the non-raw columns plus decoded float64 ones.
+
+    ``events`` is a table from :func:`read_events` or a DataFrame. Adds
+    ``price1_per_0`` (from sqrtPriceX96), ``tick_price1_per_0`` (from tick),
+    decimal-adjusted ``amount0`` / ``amount1`` and ``liquidity`` as float64.
+    """
+    keep = [c for c in (events.column_names if isinstance(events, pa.Table) else events.columns)
+            if c not in BIG_COLUMNS]
+    out = events.select(keep).to_pandas() if isinstance(events, pa.Table) else events[keep].copy()
+    if _column(events, "sqrtPriceX96") is not None:
+        out["price1_per_0"] = sqrt_price_to_price(_column(events, "sqrtPriceX96"), dec0, dec1)
+    if "tick" in out:
+        out["tick_price1_per_0"] = tick_to_price(out["tick"].to_numpy(np.float64, na_value=np.nan), dec0, dec1)
+    for name, dec in (("amount0", dec0), ("amount1", dec1), ("liquidity", 0)):
+        if _column(events, name) is not None:
+            out[name] = to_float(_column(events, name), dec)
+    return out
+
+
+def check_decoding(events, decoded, dec0, dec1, sample=10_000, seed=0):
+    """Max relative error of decoded columns against exact integer math on a random sample.
+
+    The reference price is the exact rational sqrtPriceX96**2 * 10**(dec0 - dec1) / 2**192
+    and the reference amounts are the exact integers over 10**decimals.
+    """
+    n = len(decoded)
+    idx = np.random.default_rng(seed).choice(n, size=min(sample, n), replace=False) if n else np.zeros(0, int)
+    checks = {"price1_per_0": ("sqrtPriceX96", lambda v: Fraction(v * v * 10 ** max(dec0 - dec1, 0),
+                                                                    2 ** 192 * 10 ** max(dec1 - dec0, 0))),
+              "amount0": ("amount0", lambda v: Fraction(v, 10 ** dec0)),
+              "amount1": ("amount1", lambda v: Fraction(v, 10 ** dec1)),
+              "liquidity": ("liquidity", Fraction)}
+    errors = {}
+    for col, (raw, exact) in checks.items():
+        if col not in decoded or _column(events, raw) is None:
+            continue
+        raw_values = _arrow(_column(events, raw)).take(pa.array(idx)).to_pylist()
+        worst = 0.0
+        for v, got in zip(raw_values, decoded[col].to_numpy()[idx]):
+            if v is None:
+                continue
+            want = exact(int(v))
+            if want:
+                worst = max(worst, abs(float((Fraction(float(got)) - want) / want)))
+            elif got:
+                worst = float("inf")
+        errors[col] = worst
+    return errors
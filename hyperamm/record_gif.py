@@ -3,11 +3,11 @@
 
 import time, imageio.v2 as imageio
 from pathlib import Path
-from data import Web3, RPC, POOL, fetch_liquidity_rows, plot_snapshot
+from data import Web3, RPC, POOL, LiquidityBook, plot_snapshot
 
 FRAMES_DIR = Path("frames")
 GIF_PATH    = Path("liquidity_timelapse.gif")
-INTERVAL_S  = 10            # snapshot every 10 seconds
+INTERVAL_S  = 1             # frame every second (~ one HyperEVM small block)
 TOTAL_MIN   = 5             # record for 5 minutes
 FPS         = 4             # playback speed for GIF
 
@@ -19,13 +19,17 @@ def main():
     frames = []
     nshots = int((TOTAL_MIN * 60) // INTERVAL_S)
 
+    # One full snapshot; each frame then only applies the new blocks' Mint/Burn/Swap logs
+    book = LiquidityBook(w3, POOL)
+
     # Fix a zoom window around the *initial* current price (helps visual stability)
-    df0, info0 = fetch_liquidity_rows(w3, POOL)
+    df0, info0 = book.snapshot()
     price0 = info0["curr_price"]
     zoom = (price0*0.7, price0*1.3)
 
     for i in range(nshots):
-        df, info = fetch_liquidity_rows(w3, POOL)
+        book.update()
+        df, info = book.snapshot()
         fn = FRAMES_DIR / f"liquidity_{i:04d}.png"
         plot_snapshot(df, info, POOL, outfile=str(fn), xlog=True, xlim=zoom)
         frames.append(imageio.imread(fn))
@@ -0,0 +1,44 @@
+# reserves.py
+# Pool token balances rolled forward from V3 pool events, in (block, log_index) order.
+
+# Pool-side token flow of each event, as (delta0, delta1) from its decoded args.
+# Burn only credits tokensOwed to the position; the tokens leave the pool on Collect.
+FLOWS = {
+    "Swap": lambda a: (a["amount0"], a["amount1"]),
+    "Mint": lambda a: (a["amount0"], a["amount1"]),
+    "Burn": lambda a: (0, 0),
+    "Collect": lambda a: (-a["amount0"], -a["amount1"]),
+    "CollectProtocol": lambda a: (-a["amount0"], -a["amount1"]),
+    "Flash": lambda a: (a["paid0"], a["paid1"]),
+    "Initialize": lambda a: (0, 0),
+}
+BALANCE_EVENTS = ["Swap", "Mint", "Collect", "CollectProtocol", "Flash"]
+
+
+class ReserveTracker:
+    """Raw pool balances of token0/token1, updated event by event.
+
+    Start it from ``balanceOf`` at the block before the scan; call
+    :meth:`check` with ``balanceOf`` at a later block to measure drift (tokens
+    moved without a pool event, e.g. plain transfers to the pool) and resync.
+    """
+
+    def __init__(self, balance0, balance1, block):
+        self.balance0, self.balance1 = int(balance0), int(balance1)
+        self.block = block
+
+    def apply(self, name, args, block):
+        """Apply one event; returns (before0, before1, after0, after1) raw balances."""
+        d0, d1 = FLOWS[name](args)
+        before = (self.balance0, self.balance1)
+        self.balance0 += int(d0)
+        self.balance1 += int(d1)
+        self.block = block
+        return before + (self.balance0, self.balance1)
+
+    def check(self, actual0, actual1, block):
+        """Compare with on-chain balances after ``block``; resyncs and returns the (raw) drift."""
+        drift = (int(actual0) - self.balance0, int(actual1) - self.balance1)
+        self.balance0, self.balance1 = int(actual0), int(actual1)
+        self.block = block
+        return drift
@@ -0,0 +1,250 @@
+# rpc.py
+# Raw JSON-RPC helpers shared by the pool scanner and snapshot tools.
+# pip install web3 requests aiohttp
+
+import asyncio
+import random
+import time
+import aiohttp
+import requests
+
+BATCH_SIZE = 25          # calls per JSON-RPC batch (keep under the provider's batch limit)
+MAX_RETRIES = 6
+
+# ERC20 balanceOf(address) selector
+BALANCE_OF = "0x70a08231"
+
+
+class RpcError(RuntimeError):
+    """A JSON-RPC error object returned for one call."""
+
+    def __init__(self, method, error):
+        self.method = method
+        self.error = error
+        super().__init__(f"{method}: {error}")
+
+
+def is_retryable(exc) -> bool:
+    """Rate-limit and transient transport errors that are worth retrying."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError)):
+        return True
+    msg = str(exc).lower()
+    return any(s in msg for s in ("rate limit", "too many requests", "429", "connection", "remote", "timeout"))
+
+
+def is_range_too_large(exc) -> bool:
+    """get_logs errors that mean "ask for fewer blocks" rather than "try again later".
+
+    Rate limits and transport timeouts are never range errors: bisecting on
+    them only doubles the load on a node that is already throttling.
+    """
+    msg = str(exc).lower()
+    if any(s in msg for s in ("rate limit", "too many requests", "429")):
+        return False
+    return any(s in msg for s in ("too many results", "more than", "range too large", "block range",
+                                  "response size", "limited to", "query timeout"))
+
+
+def backoff(attempt, initial_delay=1.0, max_delay=30.0):
+    """Jittered exponential backoff: uniform in [d/2, d] with d = initial * 2**attempt."""
+    d = min(max_delay, initial_delay * (2 ** attempt))
+    return d / 2 + random.random() * d / 2
+
+
+class TokenBucket:
+    """Async token-bucket limiter shared by every coroutine talking to one provider.
+
+    ``rate`` tokens per second are added up to ``burst``; each HTTP request
+    takes one token, so the provider's requests/sec limit is sustained without
+    fixed sleeps between calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, n=1):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+def retry_call(func, max_retries=MAX_RETRIES, initial_delay=1.0):
+    """Call ``func()``, retrying rate-limit/transient errors with jittered backoff."""
+    for attempt in range(max_retries):
+        try:
+            return func()
+        except Exception as e:
+            if not is_retryable(e) or attempt == max_retries - 1:
+                raise
+            time.sleep(backoff(attempt, initial_delay))
+
+
+async def async_retry_call(make_call, limiter, max_retries=MAX_RETRIES, initial_delay=1.0,
+                           retryable=is_retryable):
+    """Await ``make_call()`` under ``limiter``, retrying like :func:`retry_call`."""
+    for attempt in range(max_retries):
+        await limiter.acquire()
+        try:
+            return await make_call()
+        except Exception as e:
+            if not retryable(e) or attempt == max_retries - 1:
+                raise
+            await asyncio.sleep(backoff(attempt, initial_delay))
+
+
+def hex_int(v):
+    """Decode a JSON-RPC quantity ("0x1a") to int; passes ints and None through."""
+    if v is None or isinstance(v, int):
+        return v
+    return int(v, 16)
+
+
+def balance_of_call(token, owner, block):
+    """eth_call params for token.balanceOf(owner) at a block number."""
+    data = BALANCE_OF + owner.lower().replace("0x", "").rjust(64, "0")
+    return ("eth_call", [{"to": token, "data": data}, hex(block) if isinstance(block, int) else block])
+
+
+def _payload(calls, pending):
+    return [{"jsonrpc": "2.0", "id": i, "method": calls[i][0], "params": calls[i][1]} for i in pending]
+
+
+def _collect(reply, calls, pending, results, last_attempt, keep_errors=False):
+    """Store results of one batch reply; returns the ids that should be retried.
+
+    With ``keep_errors`` a call's non-retryable error is stored as its result
+    (an RpcError) instead of being raised.
+    """
+    if isinstance(reply, dict):      # provider rejected the batch as a whole
+        err = RpcError("batch", reply.get("error", reply))
+        if not is_retryable(err) or last_attempt:
+            raise err
+        return pending
+    by_id = {r.get("id"): r for r in reply}
+    retry = []
+    for i in pending:
+        r = by_id.get(i)
+        if r is None:
+            retry.append(i)
+        elif "error" in r:
+            err = RpcError(calls[i][0], r["error"])
+            if keep_errors and not is_retryable(err):
+                results[i] = err
+            elif not is_retryable(err) or last_attempt:
+                raise err
+            else:
+                retry.append(i)
+        else:
+            results[i] = r.get("result")
+    if retry and last_attempt:
+        raise RpcError("batch", f"{len(retry)} call(s) without a response")
+    return retry
+
+
+def _from_cache(calls, results, cache):
+    """Fill cached results in place; returns the indices still to fetch."""
+    if cache is None:
+        return list(range(len(calls)))
+    todo = []
+    for i, (method, params) in enumerate(calls):
+        hit, result = cache.get(method, params)
+        if hit:
+            results[i] = result
+        else:
+            todo.append(i)
+    return todo
+
+
+def _to_cache(calls, results, todo, cache):
+    if cache is not None and todo:
+        cache.put_many([(calls[i][0], calls[i][1], results[i]) for i in todo
+                        if not isinstance(results[i], RpcError)])
+
+
+def _post(url, payload, session, timeout):
+    resp = (session or requests).post(url, json=payload, timeout=timeout)
+    if resp.status_code == 429:
+        raise RpcError("batch", "429 too many requests")
+    resp.raise_for_status()
+    return resp.json()
+
+
+def batch_call(url, calls, session=None, batch_size=BATCH_SIZE, pause=0.0,
+               max_retries=MAX_RETRIES, initial_delay=1.0, timeout=30, cache=None, keep_errors=False):
+    """Send (method, params) calls as JSON-RPC batches; returns results in call order.
+
+    Calls that fail with a retryable error (whole batch or single item) are
+    retried with jittered backoff; any other error raises RpcError, or with
+    ``keep_errors`` is returned in place of that call's result (e.g. a
+    reverted eth_call).
+    ``pause`` seconds are slept after every HTTP request to stay under the
+    provider's rate limit. With an :class:`rpc_cache.RpcCache`, cached calls
+    are answered locally and immutable results are stored.
+    """
+    results = [None] * len(calls)
+    todo = _from_cache(calls, results, cache)
+    for start in range(0, len(todo), batch_size):
+        pending = todo[start:start + batch_size]
+        for attempt in range(max_retries):
+            last = attempt == max_retries - 1
+            try:
+                reply = _post(url, _payload(calls, pending), session, timeout)
+            except Exception as e:
+                if not is_retryable(e) or last:
+                    raise
+                time.sleep(backoff(attempt, initial_delay))
+                continue
+            if pause:
+                time.sleep(pause)
+            pending = _collect(reply, calls, pending, results, last, keep_errors)
+            if not pending:
+                break
+            time.sleep(backoff(attempt, initial_delay))
+    _to_cache(calls, results, todo, cache)
+    return results
+
+
+async def _apost(url, payload, session, timeout):
+    async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        if resp.status == 429:
+            raise RpcError("batch", "429 too many requests")
+        resp.raise_for_status()
+        return await resp.json(content_type=None)
+
+
+async def async_batch_call(url, calls, session, limiter, batch_size=BATCH_SIZE,
+                           max_retries=MAX_RETRIES, initial_delay=1.0, timeout=30, cache=None):
+    """Async :func:`batch_call`: all batches are sent concurrently, paced by ``limiter``."""
+    results = [None] * len(calls)
+    todo = _from_cache(calls, results, cache)
+
+    async def run(pending):
+        for attempt in range(max_retries):
+            last = attempt == max_retries - 1
+            await limiter.acquire()
+            try:
+                reply = await _apost(url, _payload(calls, pending), session, timeout)
+            except Exception as e:
+                if not is_retryable(e) or last:
+                    raise
+                await asyncio.sleep(backoff(attempt, initial_delay))
+                continue
+            pending = _collect(reply, calls, pending, results, last)
+            if not pending:
+                return
+            await asyncio.sleep(backoff(attempt, initial_delay))
+
+    await asyncio.gather(*(run(todo[s:s + batch_size]) for s in range(0, len(todo), batch_size)))
+    _to_cache(calls, results, todo, cache)
+    return results
@@ -0,0 +1,172 @@
+# rpc_cache.py
+# Persistent cache of immutable JSON-RPC responses (SQLite), shared by the pool
+# scanner and the liquidity snapshot tools.
+# pip install web3
+
+import hashlib
+import json
+import os
+import sqlite3
+from web3 import HTTPProvider, AsyncHTTPProvider
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "hyper-pipeline", "rpc_cache.sqlite")
+HYPEREVM_CHAIN_ID = 999
+CONFIRMATIONS = 10    # blocks behind the head that are treated as final
+
+# where each method carries its block parameter
+_BLOCK_PARAM = {"eth_getBlockByNumber": 0, "eth_call": 1, "eth_getCode": 1, "eth_getBalance": 1,
+                "eth_getStorageAt": 2, "eth_getTransactionCount": 1}
+_BY_HASH = {"eth_getTransactionByHash", "eth_getTransactionReceipt", "eth_getBlockByHash"}
+
+
+def _block_number(tag):
+    """Numeric block of a block parameter, None for tags like "latest"."""
+    if isinstance(tag, int):
+        return tag
+    if isinstance(tag, str) and tag.startswith("0x"):
+        return int(tag, 16)
+    if isinstance(tag, dict) and "blockNumber" in tag:    # EIP-1898 block object
+        return _block_number(tag["blockNumber"])
+    return None
+
+
+class RpcCache:
+    """Content-addressed store of JSON-RPC results that can never change.
+
+    A response is kept when it is addressed by hash (transactions, receipts,
+    blocks) or pinned to a numeric block at least ``confirmations`` behind the
+    highest head seen. Keys are a hash of (chain id, method, params), so the
+    cache is shared across RPC endpoints of the same chain.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, chain_id=HYPEREVM_CHAIN_ID, confirmations=CONFIRMATIONS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.chain_id = chain_id
+        self.confirmations = confirmations
+        self.head = None
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rpc (key TEXT PRIMARY KEY, method TEXT, result TEXT)")
+        self.db.commit()
+        self.hits = self.misses = 0
+
+    # ---------- finality ----------
+    def set_head(self, block):
+        self.head = max(self.head or 0, int(block))
+
+    @property
+    def finalized_block(self):
+        return None if self.head is None else self.head - self.confirmations
+
+    def is_final(self, block):
+        return block is not None and self.head is not None and block <= self.finalized_block
+
+    def may_cache(self, method, params):
+        """Whether a request could be served from the cache at all (by hash or numeric block)."""
+        if method in _BY_HASH:
+            return True
+        if method == "eth_getLogs":
+            flt = params[0]
+            return "blockHash" in flt or _block_number(flt.get("toBlock")) is not None
+        i = _BLOCK_PARAM.get(method)
+        return i is not None and len(params) > i and _block_number(params[i]) is not None
+
+    def cacheable(self, method, params, result):
+        if result is None:
+            return False
+        if method in _BY_HASH:
+            # pending txs have no block yet
+            return method == "eth_getBlockByHash" or self.is_final(_block_number(result.get("blockNumber")))
+        if method == "eth_getLogs":
+            flt = params[0]
+            return "blockHash" in flt or self.is_final(_block_number(flt.get("toBlock")))
+        i = _BLOCK_PARAM.get(method)
+        return i is not None and len(params) > i and self.is_final(_block_number(params[i]))
+
+    # ---------- storage ----------
+    def key(self, method, params):
+        blob = json.dumps([self.chain_id, method, params], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.lower().encode("utf-8")).hexdigest()
+
+    def get(self, method, params):
+        """(True, result) on a hit, (False, None) otherwise."""
+        if not self.may_cache(method, params):
+            return False, None
+        row = self.db.execute("SELECT result FROM rpc WHERE key = ?", (self.key(method, params),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, json.loads(row[0])
+
+    def put_many(self, items):
+        """Store (method, params, result) triples that are immutable; others are ignored."""
+        rows = [(self.key(m, p), m, json.dumps(r, separators=(",", ":")))
+                for m, p, r in items if self.cacheable(m, p, r)]
+        if rows:
+            self.db.executemany("INSERT OR REPLACE INTO rpc (key, method, result) VALUES (?, ?, ?)", rows)
+            self.db.commit()
+
+    def put(self, method, params, result):
+        self.put_many([(method, params, result)])
+
+    def observe(self, method, result):
+        if method == "eth_blockNumber" and result is not None:
+            self.set_head(int(result, 16) if isinstance(result, str) else result)
+
+    def close(self):
+        self.db.close()
+
+
+class CachedHTTPProvider(HTTPProvider):
+    """HTTPProvider that answers immutable requests from an RpcCache."""
+
+    def __init__(self, endpoint_uri, rpc_cache, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.rpc_cache = rpc_cache
+        self.chain_id_result = None    # web3 asks for eth_chainId before every call; it never changes
+
+    def make_request(self, method, params):
+        if method == "eth_chainId" and self.chain_id_result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": self.chain_id_result}
+        hit, result = self.rpc_cache.get(method, params)
+        if hit:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}
+        if self.rpc_cache.head is None and self.rpc_cache.may_cache(method, params):
+            # need the head to tell final blocks from recent ones
+            self.rpc_cache.observe("eth_blockNumber", super().make_request("eth_blockNumber", []).get("result"))
+        resp = super().make_request(method, params)
+        if method == "eth_chainId":
+            self.chain_id_result = resp.get("result")
+        if "result" in resp:
+            self.rpc_cache.observe(method, resp["result"])
+            self.rpc_cache.put(method, params, resp["result"])
+        return resp
+
+
+class CachedAsyncHTTPProvider(AsyncHTTPProvider):
+    """AsyncHTTPProvider counterpart of :class:`CachedHTTPProvider`."""
+
+    def __init__(self, endpoint_uri, rpc_cache, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.rpc_cache = rpc_cache
+        self.chain_id_result = None    # web3 asks for eth_chainId before every call; it never changes
+
+    async def make_request(self, method, params):
+        if method == "eth_chainId" and self.chain_id_result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": self.chain_id_result}
+        hit, result = self.rpc_cache.get(method, params)
+        if hit:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}
+        if self.rpc_cache.head is None and self.rpc_cache.may_cache(method, params):
+            head = await super().make_request("eth_blockNumber", [])
+            self.rpc_cache.observe("eth_blockNumber", head.get("result"))
+        resp = await super().make_request(method, params)
+        if method == "eth_chainId":
+            self.chain_id_result = resp.get("result")
+        if "result" in resp:
+            self.rpc_cache.observe(method, resp["result"])
+            self.rpc_cache.put(method, params, resp["result"])
+        return resp
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import glob
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .book_store import BookStore, to_ms, to_ms_delta
+from .convert import _write_parquet, open_dataset
+
+BOOK_COLUMNS = ("best_bid_px", "best_ask_px", "mid_price", "spread")
+# Negative horizons look before the swap (lead), positive ones after it (lag).
+DEFAULT_HORIZONS = ("-5s", "1s", "5s", "30s", "60s")
+DAY_MS = 86_400_000
+CHUNK_ROWS = 500_000
+
+
+def horizon_ms(horizon) -> int:
+    """Signed horizon in ms from int ms, a timedelta or a string such as ``"-5s"`` / ``"1min"``."""
+    if isinstance(horizon, str):
+        return to_ms_delta(pd.Timedelta(horizon))
+    return to_ms_delta(horizon)
+
+
+def horizon_label(ms: int) -> str:
+    """Column suffix for a horizon, e.g. ``m5s`` for -5 s and ``p500ms`` for +500 ms."""
+    sign = "m" if ms < 0 else "p"
+    ms = abs(ms)
+    if ms % 1000:
+        return f"{sign}{ms}ms"
+    return f"{sign}{ms // 1000}s"
+
+
+def swap_times_ms(swaps: pd.DataFrame) -> np.ndarray:
+    """Epoch-ms time of each swap from ``datetime`` or, failing that, ``timestamp`` seconds."""
+    if "datetime" in swaps:
+        return to_ms(swaps["datetime"])
+    return swaps["timestamp"].to_numpy(np.int64) * 1000
+
+
+def _date_key(day: int) -> int:
+    return int(datetime.fromtimestamp(day * 86_400, tz=timezone.utc).strftime("%Y%m%d"))
+
+
+def load_book_day(
+    out_root: str, coin: str, day: int, before_ms: int = 0, after_ms: int = 0
+) -> BookStore:
+    """l2book snapshots of one UTC day (days since epoch) plus margins into its neighbours.
+
+    Only the ``date`` partitions of the day and the two around it are scanned,
+    and of the neighbours only the last ``before_ms`` / first ``after_ms``.
+    """
+    import pyarrow.dataset as ds
+
+    start = day * DAY_MS
+
+    def ts(ms: int) -> pa.Scalar:
+        return pa.scalar(ms, type=pa.timestamp("ms", tz="UTC"))
+
+    date, time = ds.field("date"), ds.field("time")
+    flt = (ds.field("coin") == coin) & (
+        (date == _date_key(day))
+        | ((date == _date_key(day - 1)) & (time >= ts(start - before_ms)))
+        | ((date == _date_key(day + 1)) & (time < ts(start + DAY_MS + after_ms)))
+    )
+    table = open_dataset(out_root, "l2book").to_table(columns=["time", *BOOK_COLUMNS], filter=flt)
+    table = table.sort_by("time")
+    cols: Dict[str, np.ndarray] = {
+        c: table.column(c).to_numpy().astype(np.float64) for c in BOOK_COLUMNS
+    }
+    cols["time"] = table.column("time").cast(pa.int64()).to_numpy()
+    return BookStore.from_columns(cols)
+
+
+def _side_sign(swaps: pd.DataFrame) -> np.ndarray:
+    """+1 for buys, -1 for sells and NaN otherwise (taker view of token0)."""
+    if "side" in swaps:
+        side = swaps["side"].astype(str).to_numpy()
+        return np.select([side == "buy", side == "sell"], [1.0, -1.0], np.nan)
+    a0 = swaps["amount0"].to_numpy(np.float64)
+    return np.select([a0 < 0, a0 > 0], [1.0, -1.0], np.nan)
+
+
+def align_frame(
+    swaps: pd.DataFrame,
+    book: BookStore,
+    horizons_ms: Sequence[int],
+    tolerance_ms: Optional[int] = None,
+    price_col: str = "exec_price",
+) -> pd.DataFrame:
+    """Book state around each swap, basis against the pool and markouts at each horizon.
+
+    Adds ``book_before_*`` (last snapshot at or before the swap) and
+    ``book_after_*`` (first one after it), ``basis_before_bps`` /
+    ``basis_after_bps`` (pool price vs that mid), ``cost_vs_mid_bps`` (price
+    paid vs the mid before, positive = worse than the book) and, per horizon,
+    ``mid_<label>`` and ``markout_<label>_bps`` (move of the mid from the swap
+    price in the taker's favour). Snapshots further than ``tolerance_ms`` away
+    count as missing.
+    """
+    t = swap_times_ms(swaps)
+    out = swaps.reset_index(drop=True).copy()
+    before = book.take(book.asof_index(t, tolerance_ms), BOOK_COLUMNS)
+    after = book.take(book.after_index(t, tolerance_ms), BOOK_COLUMNS)
+    for prefix, state in (("book_before", before), ("book_after", after)):
+        out[f"{prefix}_time"] = pd.to_datetime(state["time"].view("datetime64[ms]"), utc=True)
+        out[f"{prefix}_bid"] = state["best_bid_px"]
+        out[f"{prefix}_ask"] = state["best_ask_px"]
+        out[f"{prefix}_mid"] = state["mid_price"]
+        out[f"{prefix}_spread"] = state["spread"]
+
+    sign = _side_sign(out)
+    price = out[price_col].to_numpy(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "pool_price_before" in out:
+            out["basis_before_bps"] = (
+                out["pool_price_before"].to_numpy(np.float64) / before["mid_price"] - 1.0
+            ) * 1e4
+        if "pool_price_after" in out:
+            out["basis_after_bps"] = (
+                out["pool_price_after"].to_numpy(np.float64) / after["mid_price"] - 1.0
+            ) * 1e4
+        out["cost_vs_mid_bps"] = sign * (price / before["mid_price"] - 1.0) * 1e4
+        for h in horizons_ms:
+            label = horizon_label(h)
+            mid = book.take(book.asof_index(t + h, tolerance_ms), ["mid_price"])["mid_price"]
+            out[f"mid_{label}"] = mid
+            out[f"markout_{label}_bps"] = sign * (mid / price - 1.0) * 1e4
+    return out
+
+
+def iter_swap_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Time-ordered DataFrame chunks of an enriched swaps Parquet file or directory of files."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True))
+    else:
+        files = [path]
+    for p in files:
+        for batch in pq.ParquetFile(p).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def align_swaps(
+    swap_chunks: Iterable[pd.DataFrame],
+    out_root: str,
+    coin: str = "HYPE",
+    horizons: Sequence = DEFAULT_HORIZONS,
+    tolerance="10s",
+    price_col: str = "exec_price",
+) -> Iterator[pd.DataFrame]:
+    """Yield aligned frames, one per chunk and UTC day, from time-ordered swap chunks.
+
+    Only the book of the current day (plus the margins the horizons and the
+    tolerance need) is held in memory; it is loaded once per day however many
+    chunks that day spans.
+    """
+    hs = [horizon_ms(h) for h in horizons]
+    tol = horizon_ms(tolerance) if tolerance is not None else None
+    before_ms = max([-min(hs + [0]), 0]) + (tol or 0)
+    after_ms = max(hs + [0]) + (tol or 0)
+    current: Optional[int] = None
+    book: Optional[BookStore] = None
+    for chunk in swap_chunks:
+        if chunk.empty:
+            continue
+        days = swap_times_ms(chunk) // DAY_MS
+        for day in np.unique(days):
+            if day != current:
+                book = load_book_day(out_root, coin, int(day), before_ms, after_ms)
+                current = int(day)
+            yield align_frame(chunk[days == day], book, hs, tol, price_col)
+
+
+def write_alignment(frames: Iterable[pd.DataFrame], out_dir: str) -> List[str]:
+    """Write aligned frames as ``date=YYYYMMDD/part-<n>.parquet`` under ``out_dir``.
+
+    Parts a previous run left in the dates written here are removed once the
+    new ones are in place, so a rerun that yields fewer parts leaves no stale
+    rows behind.
+    """
+    written: List[str] = []
+    counts: Dict[str, int] = {}
+    for df in frames:
+        if df.empty:
+            continue
+        date = str(_date_key(int(swap_times_ms(df.iloc[:1])[0] // DAY_MS)))
+        n = counts.get(date, 0)
+        counts[date] = n + 1
+        path = os.path.join(out_dir, f"date={date}", f"part-{n:05d}.parquet")
+        table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+        written.append(_write_parquet(table, path))
+    for date in counts:
+        pattern = os.path.join(out_dir, f"date={date}", "part-*.parquet")
+        for old in set(glob.glob(pattern)) - set(written):
+            os.remove(old)
+    return written
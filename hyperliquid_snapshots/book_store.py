@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from .l2book import read_l2book_files
+
+META_NAME = "meta.json"
+# int64 sentinel for "no snapshot"; reads as NaT when viewed as datetime64[ms]
+NAT = np.iinfo(np.int64).min
+
+
+def to_ms(times) -> np.ndarray:
+    """Normalise timestamps to an int64 epoch-millisecond array.
+
+    Accepts int ms, ``datetime64`` arrays, pandas Series/DatetimeIndex (tz-aware
+    or naive UTC) and scalars.
+    """
+    if hasattr(times, "dt"):  # pandas Series
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+        return times.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    if hasattr(times, "tz"):  # DatetimeIndex / Timestamp
+        if times.tz is not None:
+            times = times.tz_convert("UTC").tz_localize(None)
+        return np.atleast_1d(np.asarray(times, dtype="datetime64[ms]")).astype(np.int64)
+    arr = np.atleast_1d(np.asarray(times))
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ms]").astype(np.int64)
+    return arr.astype(np.int64)
+
+
+def to_ms_delta(delta) -> int:
+    """Normalise a tolerance (int ms, timedelta, ``np.timedelta64``, ``pd.Timedelta``) to ms."""
+    if hasattr(delta, "total_seconds"):
+        return int(round(delta.total_seconds() * 1000))
+    if isinstance(delta, np.timedelta64):
+        return int(delta.astype("timedelta64[ms]").astype(np.int64))
+    return int(delta)
+
+
+class BookStore:
+    """Book snapshots on a sorted int64 (epoch ms) time index.
+
+    Columns are plain NumPy arrays, memory-mapped from ``.npy`` files when
+    opened from disk, so a day of snapshots can be queried without loading it
+    into pandas. Lookups are a single ``searchsorted`` over all query times:
+    O(M log N) for M queries against N snapshots.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]) -> None:
+        if "time" not in columns:
+            raise ValueError("BookStore needs a 'time' column")
+        self.columns = columns
+        self.time = columns["time"]
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def names(self) -> Sequence[str]:
+        return [c for c in self.columns if c != "time"]
+
+    # ---------- construction ----------
+    @classmethod
+    def from_columns(cls, cols: Dict[str, np.ndarray]) -> "BookStore":
+        """Build an in-memory store, sorting rows by time."""
+        t = to_ms(cols["time"])
+        order = np.argsort(t, kind="stable")
+        out = {"time": t[order]}
+        for c, v in cols.items():
+            if c != "time":
+                out[c] = np.asarray(v)[order]
+        return cls(out)
+
+    @classmethod
+    def from_frame(cls, df, columns: Optional[Iterable[str]] = None) -> "BookStore":
+        """Build from a DataFrame with a ``time`` column (datetime or epoch ms)."""
+        names = list(columns) if columns is not None else [
+            c for c in df.columns if c != "time" and np.issubdtype(df[c].dtype, np.number)
+        ]
+        cols = {c: df[c].to_numpy() for c in names}
+        cols["time"] = to_ms(df["time"])
+        return cls.from_columns(cols)
+
+    def save(self, path: str) -> str:
+        """Write one ``.npy`` per column plus ``meta.json`` under directory ``path``."""
+        os.makedirs(path, exist_ok=True)
+        for c, v in self.columns.items():
+            np.save(os.path.join(path, f"{c}.npy"), np.ascontiguousarray(v))
+        with open(os.path.join(path, META_NAME), "w", encoding="utf-8") as f:
+            json.dump({"columns": list(self.columns), "rows": len(self)}, f)
+        return path
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "BookStore":
+        with open(os.path.join(path, META_NAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        cols = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode=mode) for c in meta["columns"]}
+        return cls(cols)
+
+    @classmethod
+    def build_from_l2book(
+        cls, paths: Sequence[str], out_path: str, processes: Optional[int] = None
+    ) -> "BookStore":
+        """Parse l2Book files (see :mod:`hyperliquid_snapshots.l2book`) into a store on disk."""
+        cls.from_columns(read_l2book_files(paths, processes=processes)).save(out_path)
+        return cls.open(out_path)
+
+    # ---------- queries ----------
+    def asof_index(self, times, tolerance=None) -> np.ndarray:
+        """Row of the last snapshot at or before each time; -1 where there is none.
+
+        With ``tolerance``, snapshots older than ``time - tolerance`` count as missing.
+        """
+        q = to_ms(times)
+        idx = np.searchsorted(self.time, q, side="right") - 1
+        if tolerance is not None:
+            ok = idx >= 0
+            stale = np.zeros(len(idx), dtype=bool)
+            stale[ok] = (q[ok] - self.time[idx[ok]]) > to_ms_delta(tolerance)
+            idx[stale] = -1
+        return idx
+
+    def after_index(self, times, tolerance=None) -> np.ndarray:
+        """Row of the first snapshot strictly after each time; -1 where there is none.
+
+        With ``tolerance``, snapshots later than ``time + tolerance`` count as missing.
+        """
+        q = to_ms(times)
+        idx = np.searchsorted(self.time, q, side="right").astype(np.int64)
+        idx[idx >= len(self.time)] = -1
+        if tolerance is not None:
+            ok = idx >= 0
+            late = np.zeros(len(idx), dtype=bool)
+            late[ok] = (self.time[idx[ok]] - q[ok]) > to_ms_delta(tolerance)
+            idx[late] = -1
+        return idx
+
+    def nearest_index(self, times, tolerance=None) -> np.ndarray:
+        """Row of the snapshot closest in time to each query; ties go to the earlier one.
+
+        With ``tolerance``, matches further away than that are returned as -1.
+        """
+        q = to_ms(times)
+        n = len(self.time)
+        if n == 0:
+            return np.full(len(q), -1, dtype=np.int64)
+        right = np.searchsorted(self.time, q, side="left")
+        left = np.clip(right - 1, 0, n - 1)
+        right = np.clip(right, 0, n - 1)
+        d_left = np.abs(q - self.time[left])
+        d_right = np.abs(self.time[right] - q)
+        idx = np.where(d_right < d_left, right, left).astype(np.int64)
+        if tolerance is not None:
+            idx[np.minimum(d_left, d_right) > to_ms_delta(tolerance)] = -1
+        return idx
+
+    def take(self, idx: np.ndarray, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Gather rows by index; -1 rows come back as NaN (and :data:`NAT` for ``time``)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        missing = idx < 0
+        safe = np.where(missing, 0, idx)
+        out: Dict[str, np.ndarray] = {"index": idx}
+        t = np.asarray(self.time[safe]) if len(self) else np.zeros(len(idx), np.int64)
+        out["time"] = np.where(missing, NAT, t)
+        for c in columns if columns is not None else self.names:
+            v = np.asarray(self.columns[c][safe], dtype=np.float64) if len(self) else np.zeros(len(idx))
+            out[c] = np.where(missing, np.nan, v)
+        return out
+
+    def asof(self, times, columns: Optional[Iterable[str]] = None, tolerance=None) -> Dict[str, np.ndarray]:
+        """Book state as of each time (last snapshot at or before it)."""
+        return self.take(self.asof_index(times, tolerance=tolerance), columns)
+
+    def nearest(self, times, tolerance=None, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Book state at the snapshot nearest each time."""
+        return self.take(self.nearest_index(times, tolerance=tolerance), columns)
@@ -2,19 +2,33 @@ from __future__ import annotations
 
 import argparse
 import os
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 
 from .s3_utils import (
     asset_ctxs_key,
-    download_s3_file,
     essential_buckets,
     fills_prefix,
     get_s3_client,
     iter_objects,
     list_prefixes,
+    make_transfer_config,
     market_data_key,
+    object_meta,
 )
-from .decompress import decompress_lz4_file
+from .align import DEFAULT_HORIZONS, align_swaps, iter_swap_chunks, write_alignment
+from .convert import convert_sources, discover_sources
+from .decompress import decompress_tree, find_lz4_files
+from .features import (
+    DEFAULT_HORIZONS as FEATURE_HORIZONS,
+    DEFAULT_OFI_WINDOWS,
+    DEFAULT_TOLERANCE,
+    build_features,
+)
+from .fills_extract import extract_fills
+from .listing_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, ListingCache
+from .manifest import Manifest
+from .transfer import run_downloads
 
 
 def _unique(seq: List[str]) -> List[str]:
@@ -30,10 +44,11 @@ def list_market_data_levels(
     hour: Optional[str],
     datatype: str,
     level: str,
+    cache: Optional[ListingCache] = None,
 ) -> List[str]:
     # Dates
     if level == "dates":
-        prefixes = list_prefixes(client, bucket=bucket, prefix="market_data/")
+        prefixes = list_prefixes(client, bucket=bucket, prefix="market_data/", cache=cache)
         # Expect prefixes like market_data/20230916/
         return [p.rstrip("/").split("/")[-1] for p in prefixes]
 
@@ -42,7 +57,7 @@ def list_market_data_levels(
 
     # Hours
     if level == "hours":
-        prefixes = list_prefixes(client, bucket=bucket, prefix=f"market_data/{date}/")
+        prefixes = list_prefixes(client, bucket=bucket, prefix=f"market_data/{date}/", cache=cache)
         return [p.rstrip("/").split("/")[-1] for p in prefixes]
 
     # Coins (files under datatype)
@@ -51,7 +66,7 @@ def list_market_data_levels(
             raise SystemExit("--hour is required for level=coins")
         prefix = f"market_data/{date}/{hour}/{datatype}/"
         coins: List[str] = []
-        for obj in iter_objects(client, bucket=bucket, prefix=prefix):
+        for obj in iter_objects(client, bucket=bucket, prefix=prefix, cache=cache):
             key = obj.get("Key", "")
             if not key.lower().endswith(".lz4"):
                 continue
@@ -66,20 +81,24 @@ def list_market_data_levels(
             prefix = f"market_data/{date}/{hour}/{datatype}/"
         else:
             prefix = f"market_data/{date}/"
-        return [obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=prefix)]
+        return [
+            obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=prefix, cache=cache)
+        ]
 
     raise SystemExit(f"Unknown level: {level}")
 
 
-def list_asset_ctxs_levels(client, bucket: str, date: Optional[str], level: str) -> List[str]:
+def list_asset_ctxs_levels(
+    client, bucket: str, date: Optional[str], level: str, cache: Optional[ListingCache] = None
+) -> List[str]:
     if level == "dates":
-        prefixes = list_prefixes(client, bucket=bucket, prefix="asset_ctxs/")
+        prefixes = list_prefixes(client, bucket=bucket, prefix="asset_ctxs/", cache=cache)
         # This may return empty prefixes if files sit directly; fall back to listing objects
         if prefixes:
             return [p.rstrip("/").split("/")[-1] for p in prefixes]
         # Fallback: scan objects and infer dates from filenames
         dates: List[str] = []
-        for obj in iter_objects(client, bucket=bucket, prefix="asset_ctxs/"):
+        for obj in iter_objects(client, bucket=bucket, prefix="asset_ctxs/", cache=cache):
             key = obj.get("Key", "")
             base = os.path.basename(key)
             if base.endswith(".csv.lz4"):
@@ -88,22 +107,47 @@ def list_asset_ctxs_levels(client, bucket: str, date: Optional[str], level: str)
         return _unique(dates)
     if level == "objects":
         pre = "asset_ctxs/" if not date else f"asset_ctxs/{date}"
-        return [obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=pre)]
+        return [obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=pre, cache=cache)]
     raise SystemExit("Only --level dates or objects is supported for asset_ctxs")
 
 
-def list_fills_levels(client, bucket: str, date: Optional[str], level: str) -> List[str]:
+def list_fills_levels(
+    client, bucket: str, date: Optional[str], level: str, cache: Optional[ListingCache] = None
+) -> List[str]:
     if level == "objects":
         pre = fills_prefix(date)
-        return [obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=pre)]
+        return [obj["Key"] for obj in iter_objects(client, bucket=bucket, prefix=pre, cache=cache)]
     if level == "dates":
-        prefixes = list_prefixes(client, bucket=bucket, prefix="node_fills_by_block/")
+        prefixes = list_prefixes(client, bucket=bucket, prefix="node_fills_by_block/", cache=cache)
         return [p.rstrip("/").split("/")[-1] for p in prefixes]
     raise SystemExit("Only --level dates or objects is supported for fills")
 
 
+def _listing_cache(args: argparse.Namespace) -> Optional[ListingCache]:
+    if args.no_cache:
+        return None
+    return ListingCache(cache_dir=args.cache_dir, ttl=args.cache_ttl, refresh=args.refresh)
+
+
+def _add_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--refresh", action="store_true", help="Re-list S3 and overwrite cached listings"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not read or write the listing cache"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help="Seconds before non-historical cached listings expire (default 3600)",
+    )
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Listing cache directory")
+
+
 def cmd_list(args: argparse.Namespace) -> None:
     client = get_s3_client(profile=args.profile, region=args.region)
+    cache = _listing_cache(args)
     dataset = args.dataset
     bucket = essential_buckets[dataset]
     if dataset == "market_data":
@@ -116,24 +160,51 @@ def cmd_list(args: argparse.Namespace) -> None:
             args.hour,
             args.datatype,
             args.level,
+            cache=cache,
         )
     elif dataset == "asset_ctxs":
-        items = list_asset_ctxs_levels(client, bucket=bucket, date=args.date, level=args.level)
+        items = list_asset_ctxs_levels(
+            client, bucket=bucket, date=args.date, level=args.level, cache=cache
+        )
     else:
-        items = list_fills_levels(client, bucket=bucket, date=args.date, level=args.level)
+        items = list_fills_levels(
+            client, bucket=bucket, date=args.date, level=args.level, cache=cache
+        )
 
     for it in items:
         print(it)
 
 
 def cmd_fetch(args: argparse.Namespace) -> None:
-    client = get_s3_client(profile=args.profile, region=args.region)
+    client = get_s3_client(
+        profile=args.profile,
+        region=args.region,
+        max_pool_connections=args.jobs * args.max_concurrency,
+    )
+    transfer_config = make_transfer_config(
+        multipart_threshold_mb=args.multipart_threshold_mb,
+        multipart_chunksize_mb=args.multipart_chunksize_mb,
+        max_concurrency=args.max_concurrency,
+    )
+    cache = _listing_cache(args)
     dataset = args.dataset
     bucket = essential_buckets[dataset]
     out_root = args.out
     os.makedirs(out_root, exist_ok=True)
 
     downloaded: List[str] = []
+    jobs: List[Tuple[dict, str]] = []
+
+    def add_job(key: str) -> None:
+        obj = (
+            {"Key": key}
+            if args.dry_run
+            else object_meta(client, bucket=bucket, key=key, cache=cache)
+        )
+        if obj is None:
+            print(f"WARN: failed {key}: not found in s3://{bucket}")
+            return
+        jobs.append((obj, os.path.join(out_root, key)))
 
     if dataset == "market_data":
         if not args.coin:
@@ -154,56 +225,40 @@ def cmd_fetch(args: argparse.Namespace) -> None:
                 None,
                 datatype,
                 level="hours",
+                cache=cache,
             )
         for hour in hours:
-            key = market_data_key(args.date, hour, datatype, args.coin)
-            dest = os.path.join(out_root, key)
-            if args.dry_run:
-                print(f"DRY RUN: would download s3://{bucket}/{key} -> {dest}")
-                continue
-            try:
-                download_s3_file(client, bucket=bucket, key=key, dest_path=dest)
-                downloaded.append(dest)
-                if args.decompress:
-                    out = decompress_lz4_file(dest, remove_src=args.rm_lz4)
-                    print(f"Decompressed: {out}")
-                print(f"Downloaded: {dest}")
-            except Exception as e:
-                print(f"WARN: failed {key}: {e}")
+            add_job(market_data_key(args.date, hour, datatype, args.coin))
 
     elif dataset == "asset_ctxs":
-        key = asset_ctxs_key(args.date)
-        dest = os.path.join(out_root, key)
-        if args.dry_run:
-            print(f"DRY RUN: would download s3://{bucket}/{key} -> {dest}")
-        else:
-            download_s3_file(client, bucket=bucket, key=key, dest_path=dest)
-            downloaded.append(dest)
-            if args.decompress:
-                out = decompress_lz4_file(dest, remove_src=args.rm_lz4)
-                print(f"Decompressed: {out}")
-            print(f"Downloaded: {dest}")
+        add_job(asset_ctxs_key(args.date))
 
     else:  # fills
         prefix = fills_prefix(args.date)
-        for obj in iter_objects(client, bucket=bucket, prefix=prefix):
+        for obj in iter_objects(client, bucket=bucket, prefix=prefix, cache=cache):
             key = obj.get("Key", "")
             if not key:
                 continue
-            dest = os.path.join(out_root, key)
-            if args.dry_run:
-                print(f"DRY RUN: would download s3://{bucket}/{key} -> {dest}")
-                continue
-            try:
-                download_s3_file(client, bucket=bucket, key=key, dest_path=dest)
-                downloaded.append(dest)
-                # some fills may not be lz4; only decompress if suffix is .lz4
-                if args.decompress and dest.lower().endswith(".lz4"):
-                    out = decompress_lz4_file(dest, remove_src=args.rm_lz4)
-                    print(f"Decompressed: {out}")
-                print(f"Downloaded: {dest}")
-            except Exception as e:
-                print(f"WARN: failed {key}: {e}")
+            jobs.append((obj, os.path.join(out_root, key)))
+
+    if args.dry_run:
+        for obj, dest in jobs:
+            print(f"DRY RUN: would download s3://{bucket}/{obj['Key']} -> {dest}")
+    elif jobs:
+        downloaded.extend(
+            run_downloads(
+                client,
+                bucket,
+                jobs,
+                n_jobs=args.jobs,
+                decompress=args.decompress,
+                rm_lz4=not args.keep_lz4 if args.stream else args.rm_lz4,
+                transfer_config=transfer_config,
+                decompress_jobs=args.decompress_jobs,
+                manifest=None if args.force else Manifest(out_root),
+                stream=args.stream,
+            )
+        )
 
     if args.summary and downloaded:
         print("\nSummary:")
@@ -211,6 +266,98 @@ def cmd_fetch(args: argparse.Namespace) -> None:
             print(d)
 
 
+def cmd_convert(args: argparse.Namespace) -> None:
+    tables = args.dataset or ["market_data", "asset_ctxs", "fills"]
+    tables = ["l2book" if t == "market_data" else t for t in tables]
+    sources = discover_sources(args.input, tables=tables, coin=args.coin)
+    if not sources:
+        raise SystemExit(f"No fetched files found under {args.input}")
+    written = convert_sources(sources, args.out, processes=args.jobs, force=args.force)
+    print(f"Wrote {len(written)} Parquet file(s) under {args.out}")
+
+
+def cmd_align(args: argparse.Namespace) -> None:
+    if not os.path.exists(args.swaps):
+        raise SystemExit(f"No enriched swaps at {args.swaps}")
+    frames = align_swaps(
+        iter_swap_chunks(args.swaps, chunk_rows=args.chunk_rows),
+        args.data,
+        coin=args.coin,
+        horizons=args.horizon or DEFAULT_HORIZONS,
+        tolerance=args.tolerance,
+        price_col=args.price_col,
+    )
+    written = write_alignment(frames, args.out)
+    print(f"Wrote {len(written)} Parquet file(s) under {args.out}")
+
+
+def cmd_features(args: argparse.Namespace) -> None:
+    written = build_features(
+        args.data,
+        coin=args.coin,
+        dates=args.date,
+        horizons=args.horizon or FEATURE_HORIZONS,
+        ofi_windows=args.ofi_window or DEFAULT_OFI_WINDOWS,
+        tolerance=args.tolerance,
+        force=args.force,
+    )
+    print(f"Wrote {len(written)} Parquet file(s) under {args.data}")
+
+
+def cmd_decompress(args: argparse.Namespace) -> None:
+    files = find_lz4_files(args.root)
+    total = len(files)
+    outputs, n_in, n_out, secs = decompress_tree(
+        args.root, processes=args.jobs, remove_src=args.rm_lz4, force=args.force, files=files
+    )
+    mb_in, mb_out = n_in / 1e6, n_out / 1e6
+    rate_in = mb_in / secs if secs > 0 else 0.0
+    rate_out = mb_out / secs if secs > 0 else 0.0
+    print(
+        f"Decompressed {len(outputs)}/{total} file(s) ({total - len(outputs)} skipped or failed): "
+        f"{mb_in:.1f} MB -> {mb_out:.1f} MB in {secs:.1f}s "
+        f"({rate_in:.1f} MB/s in, {rate_out:.1f} MB/s out)"
+    )
+
+
+def _parse_time_ms(value: Optional[str]) -> Optional[int]:
+    """Epoch ms from either an integer string or an ISO time (naive means UTC)."""
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    dt = datetime.fromisoformat(value.replace(" ", "T"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def cmd_fills(args: argparse.Namespace) -> None:
+    client = get_s3_client(profile=args.profile, region=args.region)
+    bucket = essential_buckets["fills"]
+    prefix = fills_prefix(args.date)
+    keys = [
+        obj["Key"]
+        for obj in iter_objects(client, bucket=bucket, prefix=prefix, cache=_listing_cache(args))
+        if obj.get("Key")
+    ]
+    if not keys:
+        raise SystemExit(f"No objects under s3://{bucket}/{prefix}")
+    written = extract_fills(
+        bucket,
+        keys,
+        args.out,
+        coins=args.coin,
+        users=args.user,
+        start_ms=_parse_time_ms(args.start),
+        end_ms=_parse_time_ms(args.end),
+        processes=args.jobs,
+        profile=args.profile,
+        region=args.region,
+    )
+    print(f"Wrote {len(written)} Parquet file(s) under {args.out}")
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="hyper-pipeline",
@@ -228,6 +375,7 @@ def build_parser() -> argparse.ArgumentParser:
     lp.add_argument("--date", help="YYYYMMDD for market_data/asset_ctxs")
     lp.add_argument("--hour", help="hour (e.g., 9) for market_data")
     lp.add_argument("--datatype", default="l2Book", help="market_data datatype (default l2Book)")
+    _add_cache_args(lp)
     lp.set_defaults(func=cmd_list)
 
     # fetch
@@ -242,8 +390,126 @@ def build_parser() -> argparse.ArgumentParser:
     fp.add_argument("--rm-lz4", action="store_true", help="Remove .lz4 after successful decompression")
     fp.add_argument("--dry-run", action="store_true", help="Print actions without downloading")
     fp.add_argument("--summary", action="store_true", help="Print summary of downloaded files")
+    fp.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decompress while downloading without writing the .lz4 (keep it with --keep-lz4)",
+    )
+    fp.add_argument(
+        "--keep-lz4", action="store_true", help="With --stream, also keep the compressed copy"
+    )
+    fp.add_argument(
+        "--force", action="store_true", help="Ignore the fetch manifest and re-download everything"
+    )
+    fp.add_argument("--jobs", type=int, default=1, help="Concurrent object downloads (default 1)")
+    fp.add_argument(
+        "--decompress-jobs",
+        type=int,
+        default=None,
+        help="Concurrent decompressions when --decompress is set (default: CPU count)",
+    )
+    fp.add_argument(
+        "--multipart-threshold-mb", type=int, default=8, help="Use multipart download above this size"
+    )
+    fp.add_argument("--multipart-chunksize-mb", type=int, default=8, help="Multipart part size")
+    fp.add_argument(
+        "--max-concurrency", type=int, default=10, help="Part download threads per object"
+    )
+    _add_cache_args(fp)
     fp.set_defaults(func=cmd_fetch)
 
+    # convert
+    cp = sub.add_parser(
+        "convert", help="Convert fetched archives into a Hive-partitioned Parquet dataset"
+    )
+    cp.add_argument(
+        "--dataset",
+        action="append",
+        choices=["market_data", "asset_ctxs", "fills"],
+        help="Repeatable: datasets to convert (default: all)",
+    )
+    cp.add_argument(
+        "--in", dest="input", default=os.path.join(".", "data"), help="Root written by fetch"
+    )
+    cp.add_argument(
+        "--out", default=os.path.join(".", "data", "parquet"), help="Parquet dataset root"
+    )
+    cp.add_argument("--coin", help="Only convert l2Book files for this coin")
+    cp.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    cp.add_argument("--force", action="store_true", help="Reconvert sources already converted")
+    cp.set_defaults(func=cmd_convert)
+
+    # align
+    ap = sub.add_parser(
+        "align", help="Align enriched pool swaps with the l2book snapshots around them"
+    )
+    ap.add_argument("--swaps", required=True, help="Enriched swaps Parquet file or directory")
+    ap.add_argument(
+        "--data", default=os.path.join(".", "data", "parquet"), help="Converted Parquet root"
+    )
+    ap.add_argument("--coin", default="HYPE", help="Book to align against (default HYPE)")
+    ap.add_argument(
+        "--horizon",
+        action="append",
+        help="Repeatable: markout horizon, negative for lead (e.g. --horizon=-5s, 1s, 1min)",
+    )
+    ap.add_argument(
+        "--tolerance", default="10s", help="Max distance to a usable snapshot (default 10s)"
+    )
+    ap.add_argument("--price-col", default="exec_price", help="Swap price column for markouts")
+    ap.add_argument(
+        "--out", default=os.path.join(".", "data", "parquet", "align"), help="Output directory"
+    )
+    ap.add_argument("--chunk-rows", type=int, default=500_000, help="Swaps read per chunk")
+    ap.set_defaults(func=cmd_align)
+
+    # features
+    ep = sub.add_parser(
+        "features", help="Forward returns and rolling OFI per l2book hour, written as l2features"
+    )
+    ep.add_argument(
+        "--data", default=os.path.join(".", "data", "parquet"), help="Converted Parquet root"
+    )
+    ep.add_argument("--coin", help="Only this coin (default: all converted coins)")
+    ep.add_argument("--date", action="append", help="Repeatable: YYYYMMDD (default: all dates)")
+    ep.add_argument(
+        "--horizon", action="append", help="Repeatable: forward-return horizon (e.g. 5s, 1min)"
+    )
+    ep.add_argument(
+        "--ofi-window", action="append", help="Repeatable: rolling OFI window (default 10s)"
+    )
+    ep.add_argument(
+        "--tolerance",
+        default=DEFAULT_TOLERANCE,
+        help="Max distance from time + horizon to the forward price (default 2s)",
+    )
+    ep.add_argument("--force", action="store_true", help="Recompute hours already up to date")
+    ep.set_defaults(func=cmd_features)
+
+    # decompress
+    dp = sub.add_parser("decompress", help="Decompress all .lz4 files under a directory")
+    dp.add_argument("root", help="Directory to search recursively for .lz4 files")
+    dp.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    dp.add_argument("--rm-lz4", action="store_true", help="Remove .lz4 after successful decompression")
+    dp.add_argument("--force", action="store_true", help="Decompress even if the output is up to date")
+    dp.set_defaults(func=cmd_decompress)
+
+    # fills
+    xp = sub.add_parser(
+        "fills", help="Stream node fills from S3 and keep only matching fills as Parquet"
+    )
+    xp.add_argument("--date", help="YYYYMMDD (default: all dates)")
+    xp.add_argument("--coin", action="append", help="Repeatable: coin(s) to keep")
+    xp.add_argument("--user", action="append", help="Repeatable: user address(es) to keep")
+    xp.add_argument("--start", help="Keep fills at or after this time (ISO UTC or epoch ms)")
+    xp.add_argument("--end", help="Keep fills before this time (ISO UTC or epoch ms)")
+    xp.add_argument(
+        "--out", default=os.path.join(".", "data", "parquet"), help="Parquet dataset root"
+    )
+    xp.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    _add_cache_args(xp)
+    xp.set_defaults(func=cmd_fills)
+
     return p
 
 
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import glob
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .decompress import iter_file_chunks, iter_lz4_decompressed
+from .fills import concat_fill_batches, iter_fill_batches
+from .l2book import read_l2book
+
+STATE_NAME = "_convert_state.json"
+TABLES = ("l2book", "asset_ctxs", "fills")
+# Low-cardinality string columns stored as Arrow dictionaries.
+_DICT_COLS = ("side", "dir", "fee_token", "user")
+
+# (table, source path, source id relative to the input root)
+Source = Tuple[str, str, str]
+
+
+def partition_dir(out_root: str, table: str, coin: str, date: str, hour: int) -> str:
+    """Hive partition directory for one coin/date/hour.
+
+    Coin names are URI-escaped (spot pairs may contain '/'), which pyarrow's
+    hive partitioning decodes on read.
+    """
+    return os.path.join(
+        out_root, table, f"coin={quote(coin, safe='@')}", f"date={date}", f"hour={int(hour)}"
+    )
+
+
+def _write_parquet(table: pa.Table, path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    return path
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # fixed types so every file of a table shares one schema
+    fields = []
+    for f in table.schema:
+        if f.name in _DICT_COLS:
+            f = f.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif pa.types.is_large_string(f.type) or pa.types.is_string(f.type):
+            f = f.with_type(pa.string())
+        fields.append(f)
+    return table.cast(pa.schema(fields)).replace_schema_metadata(None)
+
+
+def write_partitions(df: pd.DataFrame, out_root: str, table: str, part_name: str) -> List[str]:
+    """Split a frame with ``coin`` and UTC ``time`` columns into coin/date/hour files."""
+    if df.empty:
+        return []
+    df = df.sort_values("time", kind="stable")
+    keys = pd.DataFrame(
+        {"coin": df["coin"], "date": df["time"].dt.strftime("%Y%m%d"), "hour": df["time"].dt.hour}
+    )
+    outputs = []
+    for (coin, date, hour), idx in keys.groupby(["coin", "date", "hour"], sort=False).groups.items():
+        part = df.loc[idx].drop(columns=["coin"])
+        path = os.path.join(partition_dir(out_root, table, coin, date, hour), f"{part_name}.parquet")
+        outputs.append(_write_parquet(_to_arrow(part), path))
+    return outputs
+
+
+def _read_bytes(path: str) -> bytes:
+    chunks = iter_file_chunks(path)
+    if path.lower().endswith(".lz4"):
+        chunks = iter_lz4_decompressed(chunks)
+    return b"".join(chunks)
+
+
+def convert_l2book(path: str, out_root: str, coin: str, date: str, hour: int) -> List[str]:
+    cols = read_l2book(path)
+    arrays = {
+        "time": pa.array(cols["time"], type=pa.timestamp("ms", tz="UTC")),
+        "best_bid_px": pa.array(cols["best_bid_px"]),
+        "best_bid_sz": pa.array(cols["best_bid_sz"].astype(np.float32)),
+        "best_ask_px": pa.array(cols["best_ask_px"]),
+        "best_ask_sz": pa.array(cols["best_ask_sz"].astype(np.float32)),
+        "mid_price": pa.array(cols["mid_price"]),
+        "spread": pa.array(cols["spread"]),
+        "total_bid_size": pa.array(cols["total_bid_size"].astype(np.float32)),
+        "total_ask_size": pa.array(cols["total_ask_size"].astype(np.float32)),
+    }
+    path_out = os.path.join(partition_dir(out_root, "l2book", coin, date, hour), "part-0.parquet")
+    return [_write_parquet(pa.table(arrays), path_out)]
+
+
+def convert_asset_ctxs(path: str, out_root: str, part_name: str) -> List[str]:
+    df = pd.read_csv(io.BytesIO(_read_bytes(path)))
+    df["time"] = pd.to_datetime(df["time"], utc=True).dt.as_unit("ms")
+    for c in df.columns:
+        if c not in ("time", "coin"):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return write_partitions(df, out_root, "asset_ctxs", part_name)
+
+
+def convert_fills(path: str, out_root: str, part_name: str) -> List[str]:
+    df = pd.DataFrame(concat_fill_batches(iter_fill_batches(path)))
+    df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True).dt.as_unit("ms")
+    return write_partitions(df, out_root, "fills", part_name)
+
+
+def source_part_name(source_id: str) -> str:
+    # one output file per source so re-converting a source replaces it in place
+    stem = source_id.replace(os.sep, "/")
+    for suffix in (".lz4", ".csv", ".json", ".jsonl"):
+        if stem.lower().endswith(suffix):
+            stem = stem[: -len(suffix)]
+    return "part-" + stem.split("/", 1)[-1].replace("/", "_")
+
+
+def discover_sources(in_root: str, tables: Sequence[str] = TABLES, coin: Optional[str] = None) -> List[Source]:
+    """Find fetched files under ``in_root`` in the layout written by ``fetch``.
+
+    When both ``X.lz4`` and its decompressed ``X`` exist, the plain file is used.
+    """
+    found: Dict[str, Source] = {}
+
+    def add(table: str, path: str) -> None:
+        if path.endswith((".part", ".tmp")) or not os.path.isfile(path):
+            return
+        rel = os.path.relpath(path, in_root)
+        sid = rel[:-4] if rel.lower().endswith(".lz4") else rel
+        if sid in found and not path.lower().endswith(".lz4"):
+            found[sid] = (table, path, sid)
+        found.setdefault(sid, (table, path, sid))
+
+    if "l2book" in tables:
+        for p in glob.glob(os.path.join(in_root, "market_data", "*", "*", "l2Book", "*")):
+            if coin is None or os.path.basename(p) in (coin, f"{coin}.lz4"):
+                add("l2book", p)
+    if "asset_ctxs" in tables:
+        for p in glob.glob(os.path.join(in_root, "asset_ctxs", "*.csv*")):
+            add("asset_ctxs", p)
+    if "fills" in tables:
+        for p in glob.glob(os.path.join(in_root, "node_fills_by_block", "**", "*"), recursive=True):
+            if os.path.basename(p) != STATE_NAME:
+                add("fills", p)
+    return sorted(found.values(), key=lambda s: s[2])
+
+
+def _convert_source(source: Source, out_root: str) -> List[str]:
+    table, path, sid = source
+    if table == "l2book":
+        parts = sid.replace(os.sep, "/").split("/")
+        # market_data/<date>/<hour>/l2Book/<coin>
+        return convert_l2book(path, out_root, coin=parts[-1], date=parts[1], hour=int(parts[2]))
+    if table == "asset_ctxs":
+        return convert_asset_ctxs(path, out_root, source_part_name(sid))
+    return convert_fills(path, out_root, source_part_name(sid))
+
+
+class ConvertState:
+    """Sources already converted, keyed by source id with the size/mtime seen."""
+
+    def __init__(self, out_root: str) -> None:
+        self.path = os.path.join(out_root, STATE_NAME)
+        self.sources: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f)
+
+    @staticmethod
+    def _stamp(path: str) -> dict:
+        st = os.stat(path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def is_current(self, source: Source) -> bool:
+        _, path, sid = source
+        entry = self.sources.get(sid)
+        if entry is None or {k: entry.get(k) for k in ("size", "mtime_ns")} != self._stamp(path):
+            return False
+        return all(os.path.exists(p) for p in entry.get("outputs", []))
+
+    def stale_outputs(self, source: Source) -> List[str]:
+        return list(self.sources.get(source[2], {}).get("outputs", []))
+
+    def record(self, source: Source, outputs: List[str]) -> None:
+        self.sources[source[2]] = {**self._stamp(source[1]), "outputs": outputs}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.sources, f)
+        os.replace(tmp, self.path)
+
+
+def convert_sources(
+    sources: Sequence[Source],
+    out_root: str,
+    processes: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """Convert sources that are new or changed since the last run, in parallel.
+
+    Returns the Parquet files written.
+    """
+    state = ConvertState(out_root)
+    todo = [s for s in sources if force or not state.is_current(s)]
+    skipped = len(sources) - len(todo)
+    if skipped:
+        print(f"Skipped {skipped} unchanged source(s)")
+    written: List[str] = []
+    if not todo:
+        return written
+    with ProcessPoolExecutor(max_workers=min(len(todo), processes or os.cpu_count() or 1)) as pool:
+        futures = {pool.submit(_convert_source, s, out_root): s for s in todo}
+        for fut in as_completed(futures):
+            source = futures[fut]
+            try:
+                outputs = fut.result()
+            except Exception as e:
+                print(f"WARN: failed {source[2]}: {e}")
+                continue
+            for old in set(state.stale_outputs(source)) - set(outputs):
+                if os.path.exists(old):
+                    os.remove(old)
+            state.record(source, outputs)
+            written.extend(outputs)
+            print(f"Converted: {source[2]} -> {len(outputs)} file(s)")
+    return written
+
+
+def open_dataset(out_root: str, table: str):
+    """Open one converted table as a ``pyarrow.dataset.Dataset``.
+
+    Use ``.to_table(columns=[...], filter=...)`` for column and partition
+    pushdown, e.g. ``ds.field("date") == 20250610``.
+    """
+    import pyarrow.dataset as ds
+
+    return ds.dataset(os.path.join(out_root, table), format="parquet", partitioning="hive")
@@ -3,24 +3,58 @@ from __future__ import annotations
 import os
 import shutil
 import subprocess
-from typing import Optional
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
+CHUNK_SIZE = 1024 * 1024
 
-def _try_python_lz4(src_path: str, dst_path: str) -> bool:
-    try:
-        import lz4.frame as lz4f  # type: ignore
-    except Exception:
-        return False
-    # Stream copy to avoid large memory use
-    with open(src_path, "rb") as fin, open(dst_path, "wb") as fout:
-        dctx = lz4f.LZ4FrameDecompressor()
+
+def iter_file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as fin:
         while True:
-            chunk = fin.read(1024 * 1024)
+            chunk = fin.read(chunk_size)
             if not chunk:
                 break
+            yield chunk
+
+
+def iter_lz4_decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress a stream of LZ4 frame chunks incrementally.
+
+    Accepts any iterable of compressed bytes (a local file, an S3 body) and
+    yields decompressed bytes without materialising either side. Concatenated
+    frames are handled. Requires the Python 'lz4' package. Raises
+    ``RuntimeError`` when the input ends inside a frame.
+    """
+    import lz4.frame as lz4f  # type: ignore
+
+    dctx = lz4f.LZ4FrameDecompressor()
+    in_frame = False
+    for chunk in chunks:
+        while chunk:
+            in_frame = True
             data = dctx.decompress(chunk)
             if data:
-                fout.write(data)
+                yield data
+            chunk = b""
+            if dctx.eof:
+                chunk = dctx.unused_data or b""
+                dctx = lz4f.LZ4FrameDecompressor()
+                in_frame = False
+    if in_frame:
+        raise RuntimeError("truncated LZ4 frame")
+
+
+def _try_python_lz4(src_path: str, dst_path: str) -> bool:
+    try:
+        import lz4.frame  # type: ignore  # noqa: F401
+    except Exception:
+        return False
+    # Stream copy to avoid large memory use
+    with open(dst_path, "wb") as fout:
+        for data in iter_lz4_decompressed(iter_file_chunks(src_path)):
+            fout.write(data)
     return True
 
 
@@ -65,17 +99,27 @@ def decompress_lz4_file(
     """Decompress an .lz4 file to destination. Returns the output path.
 
     Tries Python lz4 first, then falls back to unlz4/lz4 tool if present.
+    Output is written to a temporary file and renamed into place, so an
+    interrupted run never leaves a truncated file at ``dst``.
     """
     if not os.path.exists(src_path):
         raise FileNotFoundError(src_path)
     dst = dst_path or default_output_path(src_path)
     os.makedirs(os.path.dirname(dst), exist_ok=True)
 
-    if not _try_python_lz4(src_path, dst):
-        if not _try_unlz4_tool(src_path, dst):
-            raise RuntimeError(
-                "No lz4 decompressor available. Install Python package 'lz4' or system 'unlz4'."
-            )
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        if not _try_python_lz4(src_path, tmp):
+            if not _try_unlz4_tool(src_path, tmp):
+                raise RuntimeError(
+                    "No lz4 decompressor available. Install Python package 'lz4' or system 'unlz4'."
+                )
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
 
     if remove_src:
         try:
@@ -83,3 +127,61 @@ def decompress_lz4_file(
         except OSError:
             pass
     return dst
+
+
+def find_lz4_files(root: str) -> List[str]:
+    """All ``.lz4`` files under ``root``, sorted."""
+    found = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(".lz4"):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def is_up_to_date(src_path: str, dst_path: Optional[str] = None) -> bool:
+    """True when the decompressed output exists and is not older than the source."""
+    dst = dst_path or default_output_path(src_path)
+    return os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src_path)
+
+
+def _decompress_one(src_path: str, remove_src: bool) -> Tuple[str, int, int]:
+    in_bytes = os.path.getsize(src_path)
+    dst = decompress_lz4_file(src_path, remove_src=remove_src)
+    return dst, in_bytes, os.path.getsize(dst)
+
+
+def decompress_tree(
+    root: str,
+    processes: Optional[int] = None,
+    remove_src: bool = False,
+    force: bool = False,
+    files: Optional[Sequence[str]] = None,
+) -> Tuple[List[str], int, int, float]:
+    """Decompress every ``.lz4`` under ``root`` across a process pool.
+
+    ``files`` is the :func:`find_lz4_files` listing when the caller already
+    has it, so the tree is not walked twice. Files whose output is already up
+    to date are skipped unless ``force``. Returns (outputs, compressed bytes
+    read, bytes written, elapsed seconds).
+    """
+    if files is None:
+        files = find_lz4_files(root)
+    todo = [p for p in files if force or not is_up_to_date(p)]
+    outputs: List[str] = []
+    in_total = out_total = 0
+    start = time.perf_counter()
+    if todo:
+        workers = min(len(todo), processes or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_decompress_one, p, remove_src): p for p in todo}
+            for fut in as_completed(futures):
+                try:
+                    dst, n_in, n_out = fut.result()
+                except Exception as e:
+                    print(f"WARN: failed {futures[fut]}: {e}")
+                    continue
+                outputs.append(dst)
+                in_total += n_in
+                out_total += n_out
+    return outputs, in_total, out_total, time.perf_counter() - start
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .book_store import BookStore
+from .l2book import Source, iter_lines, json_loads
+
+META_NAME = "meta.json"
+LEVELS = 20
+# Axes of the depth tensor: (time, side, level, field).
+BID, ASK = 0, 1
+PX, SZ = 0, 1
+
+Batch = Tuple[np.ndarray, np.ndarray]
+
+
+def _empty(n: int, levels: int) -> np.ndarray:
+    return np.full((n, 2, levels, 2), np.nan, dtype=np.float32)
+
+
+def iter_depth_batches(
+    source: Source, levels: int = LEVELS, batch_size: int = 65536
+) -> Iterator[Batch]:
+    """Stream an l2Book file as ``(time, depth)`` batches keeping every level.
+
+    ``time`` is int64 epoch ms and ``depth`` a float32 ``(n, 2, levels, 2)``
+    array indexed by side (:data:`BID`/:data:`ASK`), level (best first) and
+    field (:data:`PX`/:data:`SZ`). Missing levels, and every level of an
+    empty side, are NaN. Snapshots whose ``levels`` lack a bid or ask list
+    are skipped, as in :func:`~hyperliquid_snapshots.l2book.iter_l2book_batches`.
+    """
+    times: List[int] = []
+    depth = _empty(batch_size, levels)
+    for line in iter_lines(source):
+        if not line.strip():
+            continue
+        data = json_loads(line).get("raw", {}).get("data", {})
+        book = data.get("levels") or []
+        if len(book) < 2:
+            continue
+        row = len(times)
+        for side in (BID, ASK):
+            lv = book[side][:levels]
+            if lv:
+                depth[row, side, : len(lv)] = [(float(x["px"]), float(x["sz"])) for x in lv]
+        times.append(data.get("time", 0))
+        if len(times) >= batch_size:
+            yield np.asarray(times, dtype=np.int64), depth
+            times, depth = [], _empty(batch_size, levels)
+    if times:
+        yield np.asarray(times, dtype=np.int64), depth[: len(times)]
+
+
+def concat_depth_batches(batches: Iterable[Batch], levels: int = LEVELS) -> Batch:
+    parts = list(batches)
+    if not parts:
+        return np.empty(0, np.int64), _empty(0, levels)
+    return np.concatenate([t for t, _ in parts]), np.concatenate([d for _, d in parts])
+
+
+def read_depth(source: Source, levels: int = LEVELS) -> Batch:
+    """Parse a whole l2Book file into one ``(time, depth)`` pair."""
+    return concat_depth_batches(iter_depth_batches(source, levels), levels)
+
+
+def read_depth_files(paths: Sequence[str], processes: Optional[int] = None) -> Batch:
+    """Parse several l2Book files across worker processes, concatenated in ``paths`` order."""
+    if not paths:
+        return concat_depth_batches([])
+    workers = min(len(paths), processes or os.cpu_count() or 1)
+    if workers <= 1:
+        return concat_depth_batches(read_depth(p) for p in paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return concat_depth_batches(pool.map(read_depth, paths))
+
+
+class DepthStore:
+    """Full-depth book snapshots as one float32 ``(time, side, level, px|sz)`` tensor.
+
+    A day of 20-level snapshots is a few tens of MB, memory-mapped from
+    ``.npy`` when opened from disk. Queries run over every snapshot at once
+    (or the rows picked by :meth:`asof_index`) with cumulative sums across
+    levels, so there is no per-snapshot Python loop.
+    """
+
+    def __init__(self, time: np.ndarray, depth: np.ndarray) -> None:
+        shape = depth.shape
+        if len(shape) != 4 or shape[0] != len(time) or (shape[1], shape[3]) != (2, 2):
+            raise ValueError("depth must have shape (len(time), 2, levels, 2)")
+        self.time = time
+        self.depth = depth
+        self._sides: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def levels(self) -> int:
+        return self.depth.shape[2]
+
+    # ---------- construction ----------
+    @classmethod
+    def from_arrays(cls, time: np.ndarray, depth: np.ndarray) -> "DepthStore":
+        """Build an in-memory store, sorting snapshots by time."""
+        t = np.asarray(time, dtype=np.int64)
+        order = np.argsort(t, kind="stable")
+        return cls(t[order], np.asarray(depth, dtype=np.float32)[order])
+
+    def save(self, path: str) -> str:
+        """Write ``time.npy``, ``depth.npy`` and ``meta.json`` under directory ``path``."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "time.npy"), np.ascontiguousarray(self.time))
+        np.save(os.path.join(path, "depth.npy"), np.ascontiguousarray(self.depth))
+        with open(os.path.join(path, META_NAME), "w", encoding="utf-8") as f:
+            json.dump({"rows": len(self), "levels": self.levels}, f)
+        return path
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "DepthStore":
+        mode = "r" if mmap else None
+        return cls(
+            np.load(os.path.join(path, "time.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "depth.npy"), mmap_mode=mode),
+        )
+
+    @classmethod
+    def build_from_l2book(
+        cls, paths: Sequence[str], out_path: str, processes: Optional[int] = None
+    ) -> "DepthStore":
+        """Parse l2Book files into a depth store on disk."""
+        cls.from_arrays(*read_depth_files(paths, processes=processes)).save(out_path)
+        return cls.open(out_path)
+
+    # ---------- queries ----------
+    def asof_index(self, times, tolerance=None) -> np.ndarray:
+        """Row of the last snapshot at or before each time; -1 where there is none."""
+        return BookStore({"time": self.time}).asof_index(times, tolerance=tolerance)
+
+    def _index(self, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """(row numbers, missing mask); ``rows=None`` means every snapshot."""
+        if rows is None:
+            return np.arange(len(self)), np.zeros(len(self), dtype=bool)
+        rows = np.asarray(rows, dtype=np.int64)
+        missing = rows < 0
+        return np.where(missing, 0, rows), missing | (len(self) == 0)
+
+    def _side(self, side: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Contiguous prices and running (size, notional) of one side, computed once."""
+        if side not in self._sides:
+            book = np.asarray(self.depth[:, side])
+            px = np.ascontiguousarray(book[..., PX])
+            sz = np.nan_to_num(book[..., SZ].astype(np.float64))
+            notional = np.cumsum(np.nan_to_num(px.astype(np.float64)) * sz, axis=1)
+            self._sides[side] = (px, np.cumsum(sz, axis=1), notional)
+        return self._sides[side]
+
+    def mid(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        r, missing = self._index(rows)
+        if not len(self):
+            return np.full(len(r), np.nan)
+        bid = self._side(BID)[0][:, 0].astype(np.float64)
+        out = (bid + self._side(ASK)[0][:, 0]) / 2
+        return np.where(missing, np.nan, out if rows is None else out[r])
+
+    def vwap(self, size, side: str = "buy", rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Average price to fill ``size`` coins by walking the book from the top.
+
+        ``side="buy"`` lifts the asks, ``"sell"`` hits the bids. ``size`` is a
+        scalar or one size per row; NaN where the book is not deep enough.
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError(f"side must be 'buy' or 'sell', got {side!r}")
+        s = ASK if side == "buy" else BID
+        r, missing = self._index(rows)
+        q = np.broadcast_to(np.asarray(size, dtype=np.float64), r.shape)
+        if not len(self):
+            return np.full(r.shape, np.nan)
+        levels, cum, notional = self._side(s)
+        if rows is not None:
+            levels, cum, notional = levels[r], cum[r], notional[r]
+        # levels used in full; the fill ends inside level k
+        k = (cum < q[:, None]).sum(axis=1)
+        ok = (k < self.levels) & (q > 0) & ~missing
+        k = np.where(ok, k, 0)
+        i = np.arange(len(r))
+        prev = k - 1
+        cum_before = np.where(prev >= 0, cum[i, prev], 0.0)
+        notional_before = np.where(prev >= 0, notional[i, prev], 0.0)
+        px = levels[i, k].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = (notional_before + (q - cum_before) * px) / q
+        return np.where(ok, out, np.nan)
+
+    def sweep_cost(self, size, side: str = "buy", rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cost of sweeping ``size`` coins against the mid, in bps (positive = worse than mid)."""
+        sign = 1.0 if side == "buy" else -1.0
+        return sign * (self.vwap(size, side, rows) / self.mid(rows) - 1.0) * 1e4
+
+    def depth_within(
+        self, bps: float, side: Optional[str] = None, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Coins resting within ``bps`` of the mid on ``"bid"``, ``"ask"`` or both sides (None).
+
+        Levels are ordered best first, so the levels inside the band are a
+        prefix of each side and the answer is one lookup into the running sizes.
+        """
+        if side not in (None, "bid", "ask"):
+            raise ValueError(f"side must be 'bid', 'ask' or None, got {side!r}")
+        r, missing = self._index(rows)
+        mid = self.mid(rows)
+        total = np.zeros(len(r))
+        if not len(self):
+            return np.full(len(r), np.nan)
+        i = np.arange(len(r))
+        with np.errstate(invalid="ignore"):
+            for s, name, bound in ((BID, "bid", 1 - bps / 1e4), (ASK, "ask", 1 + bps / 1e4)):
+                if side not in (None, name):
+                    continue
+                px, cum, _ = self._side(s)
+                if rows is not None:
+                    px, cum = px[r], cum[r]
+                limit = (mid * bound)[:, None]
+                inside = px >= limit if s == BID else px <= limit
+                k = inside.sum(axis=1)
+                total += np.where(k > 0, cum[i, np.maximum(k - 1, 0)], 0.0)
+        return np.where(np.isnan(mid), np.nan, total)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import glob
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+import numpy as np
+import pyarrow as pa
+
+from .book_store import BookStore, to_ms_delta
+from .convert import _write_parquet, open_dataset, partition_dir
+
+FEATURES_TABLE = "l2features"
+DEFAULT_HORIZONS = ("5s", "10s", "30s", "1min")
+DEFAULT_OFI_WINDOWS = ("10s",)
+# Forward prices further than this from time + horizon count as missing.
+DEFAULT_TOLERANCE = "2s"
+HOUR_MS = 3_600_000
+DAY_MS = 86_400_000
+
+
+def _ms(value) -> int:
+    if isinstance(value, str):
+        import pandas as pd
+
+        return to_ms_delta(pd.Timedelta(value))
+    return to_ms_delta(value)
+
+
+def window_label(ms: int) -> str:
+    """Column suffix for a window/horizon: ``500ms``, ``10s``, ``1min``."""
+    if ms % 1000:
+        return f"{ms}ms"
+    if ms % 60_000 == 0:
+        return f"{ms // 60_000}min"
+    return f"{ms // 1000}s"
+
+
+def order_flow_imbalance(total_bid_size: np.ndarray, total_ask_size: np.ndarray) -> np.ndarray:
+    """(bid - ask) / (bid + ask) over all book levels; NaN for an empty book."""
+    bid = np.asarray(total_bid_size, dtype=np.float64)
+    ask = np.asarray(total_ask_size, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (bid - ask) / (bid + ask)
+
+
+def rolling_mean_std(
+    time: np.ndarray, values: np.ndarray, window_ms: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and sample std of ``values`` over ``[t - window, t)`` for every row.
+
+    Same window as pandas ``rolling(window, closed="left")`` on a time index,
+    but from prefix sums and two ``searchsorted`` calls instead of a pass per
+    window. NaN values are skipped; the std needs at least two values.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    ok = ~np.isnan(v)
+    # centre first so the sum of squares does not cancel catastrophically
+    shift = v[ok].mean() if ok.any() else 0.0
+    x = np.where(ok, v - shift, 0.0)
+    cs = np.concatenate([[0.0], np.cumsum(x)])
+    cs2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    cn = np.concatenate([[0], np.cumsum(ok)])
+    lo = np.searchsorted(time, time - window_ms, side="left")
+    hi = np.searchsorted(time, time, side="left")
+    n = (cn[hi] - cn[lo]).astype(np.float64)
+    s = cs[hi] - cs[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s / n
+        var = np.maximum(cs2[hi] - cs2[lo] - s * mean, 0.0) / (n - 1)
+    mean = np.where(n > 0, mean, np.nan)
+    std = np.where(n > 1, np.sqrt(var), np.nan)
+    return mean + shift, std
+
+
+def forward_returns(
+    book: BookStore,
+    times: np.ndarray,
+    mid: np.ndarray,
+    horizon_ms: int,
+    tolerance_ms: Optional[int],
+) -> np.ndarray:
+    """Percent change from ``mid`` to the ``mid_price`` nearest ``time + horizon``."""
+    future = book.take(book.nearest_index(times + horizon_ms, tolerance_ms), ["mid_price"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (future["mid_price"] - mid) / mid * 100.0
+
+
+def book_features(
+    book: BookStore,
+    start_ms: int,
+    end_ms: int,
+    horizons: Sequence = DEFAULT_HORIZONS,
+    ofi_windows: Sequence = DEFAULT_OFI_WINDOWS,
+    tolerance=DEFAULT_TOLERANCE,
+) -> Dict[str, np.ndarray]:
+    """Feature columns for the snapshots in ``[start_ms, end_ms)`` of ``book``.
+
+    ``book`` needs ``mid_price``, ``total_bid_size`` and ``total_ask_size`` and
+    should extend past the range by the longest window before it and the
+    longest horizon (plus tolerance) after it. Columns: ``time``, ``mid_price``,
+    ``ofi``, per window ``ofi_mean_<w>`` / ``ofi_std_<w>`` / ``ofi_z_<w>`` and per
+    horizon ``fwd_return_<h>`` (percent).
+    """
+    time = np.asarray(book.time)
+    rows = slice(
+        int(np.searchsorted(time, start_ms, side="left")),
+        int(np.searchsorted(time, end_ms, side="left")),
+    )
+    tol = _ms(tolerance) if tolerance is not None else None
+    ofi = order_flow_imbalance(book.columns["total_bid_size"], book.columns["total_ask_size"])
+    out: Dict[str, np.ndarray] = {
+        "time": time[rows],
+        "mid_price": np.asarray(book.columns["mid_price"][rows], dtype=np.float64),
+        "ofi": ofi[rows],
+    }
+    for w in ofi_windows:
+        w_ms = _ms(w)
+        label = window_label(w_ms)
+        mean, std = rolling_mean_std(time, ofi, w_ms)
+        out[f"ofi_mean_{label}"] = mean[rows]
+        out[f"ofi_std_{label}"] = std[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"ofi_z_{label}"] = (ofi[rows] - mean[rows]) / std[rows]
+    for h in horizons:
+        h_ms = _ms(h)
+        out[f"fwd_return_{window_label(h_ms)}"] = forward_returns(
+            book, out["time"], out["mid_price"], h_ms, tol
+        )
+    return out
+
+
+def _date_key(ms: int) -> int:
+    return int(datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y%m%d"))
+
+
+def load_book_range(out_root: str, coin: str, start_ms: int, end_ms: int) -> BookStore:
+    """l2book snapshots of ``coin`` in ``[start_ms, end_ms)``, pruned by date partition."""
+    import pyarrow.dataset as ds
+
+    dates = [_date_key(ms) for ms in range(start_ms - start_ms % DAY_MS, end_ms, DAY_MS)]
+
+    def ts(ms: int) -> pa.Scalar:
+        return pa.scalar(ms, type=pa.timestamp("ms", tz="UTC"))
+
+    flt = (
+        (ds.field("coin") == coin)
+        & ds.field("date").isin(dates)
+        & (ds.field("time") >= ts(start_ms))
+        & (ds.field("time") < ts(end_ms))
+    )
+    cols = ["time", "mid_price", "total_bid_size", "total_ask_size"]
+    table = open_dataset(out_root, "l2book").to_table(columns=cols, filter=flt).sort_by("time")
+    arrays = {c: table.column(c).to_numpy() for c in cols[1:]}
+    arrays["time"] = table.column("time").cast(pa.int64()).to_numpy()
+    return BookStore.from_columns(arrays)
+
+
+def list_hours(
+    out_root: str, coin: Optional[str] = None, dates: Optional[Sequence[str]] = None
+) -> List[Tuple[str, str, int, List[str]]]:
+    """(coin, date, hour, files) of every converted l2book partition, in time order."""
+    hours = []
+    pattern = os.path.join(out_root, "l2book", "coin=*", "date=*", "hour=*")
+    for d in glob.glob(pattern):
+        parts = d.split(os.sep)
+        c = unquote(parts[-3].split("=", 1)[1])
+        date = parts[-2].split("=", 1)[1]
+        hour = int(parts[-1].split("=", 1)[1])
+        if (coin is not None and c != coin) or (dates and date not in dates):
+            continue
+        files = sorted(glob.glob(os.path.join(d, "*.parquet")))
+        if files:
+            hours.append((c, date, hour, files))
+    return sorted(hours, key=lambda h: (h[0], h[1], h[2]))
+
+
+def build_features(
+    out_root: str,
+    coin: Optional[str] = None,
+    dates: Optional[Sequence[str]] = None,
+    horizons: Sequence = DEFAULT_HORIZONS,
+    ofi_windows: Sequence = DEFAULT_OFI_WINDOWS,
+    tolerance=DEFAULT_TOLERANCE,
+    force: bool = False,
+) -> List[str]:
+    """Write ``l2features`` next to ``l2book``, one file per coin/date/hour partition.
+
+    Each hour is computed from its own snapshots plus the tail of the previous
+    hour (for the OFI windows) and the head of the next (for the horizons), so
+    at most a little over one hour of book is in memory. Hours whose features
+    are newer than their l2book files are skipped unless ``force``.
+    """
+    before = max((_ms(w) for w in ofi_windows), default=0)
+    after = max((_ms(h) for h in horizons), default=0) + (_ms(tolerance) if tolerance else 0)
+    written = []
+    hours = list_hours(out_root, coin)
+    for i, (c, date, hour, files) in enumerate(hours):
+        if dates and date not in dates:
+            continue
+        path = os.path.join(
+            partition_dir(out_root, FEATURES_TABLE, c, date, hour), "features.parquet"
+        )
+        # the neighbouring hours feed the window and horizon edges
+        inputs: List[str] = []
+        for j in (i - 1, i, i + 1):
+            if 0 <= j < len(hours) and hours[j][0] == c:
+                inputs.extend(hours[j][3])
+        if (
+            not force
+            and os.path.exists(path)
+            and os.path.getmtime(path) >= max(os.path.getmtime(f) for f in inputs)
+        ):
+            continue
+        day = datetime.strptime(date, "%Y%m%d").replace(tzinfo=timezone.utc)
+        start = int((day + timedelta(hours=hour)).timestamp() * 1000)
+        book = load_book_range(out_root, c, start - before, start + HOUR_MS + after)
+        cols = book_features(book, start, start + HOUR_MS, horizons, ofi_windows, tolerance)
+        arrays = {
+            k: pa.array(v, type=pa.timestamp("ms", tz="UTC")) if k == "time" else pa.array(v)
+            for k, v in cols.items()
+        }
+        written.append(_write_parquet(pa.table(arrays), path))
+        print(f"Features: {c} {date} hour={hour} -> {len(cols['time'])} row(s)")
+    return written
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .l2book import Source, iter_lines, json_loads
+
+# ``time`` is epoch ms; string columns are object arrays.
+FILL_COLUMNS = (
+    "time",
+    "block_number",
+    "coin",
+    "user",
+    "side",
+    "dir",
+    "px",
+    "sz",
+    "fee",
+    "fee_token",
+    "closed_pnl",
+    "start_position",
+    "crossed",
+    "oid",
+    "tid",
+    "hash",
+)
+_FLOAT_COLS = ("px", "sz", "fee", "closed_pnl", "start_position")
+_INT_COLS = ("time", "block_number", "oid", "tid")
+
+
+def _iter_events(rec) -> Iterator[tuple]:
+    """Yield (user, fill, block_number) from one fills line.
+
+    Block files carry ``{"block_number", "events": [[user, fill], ...]}`` per
+    line; older per-fill files carry a bare ``[user, fill]`` pair.
+    """
+    if isinstance(rec, dict):
+        block = rec.get("block_number", -1)
+        for ev in rec.get("events") or []:
+            if len(ev) == 2:
+                yield ev[0], ev[1], block
+    elif isinstance(rec, list) and len(rec) == 2:
+        yield rec[0], rec[1], -1
+
+
+def _empty_lists() -> Dict[str, list]:
+    return {c: [] for c in FILL_COLUMNS}
+
+
+def _to_arrays(rows: Dict[str, list]) -> Dict[str, np.ndarray]:
+    out: Dict[str, np.ndarray] = {}
+    for c in FILL_COLUMNS:
+        if c in _FLOAT_COLS:
+            out[c] = np.asarray(rows[c], dtype=np.float64)
+        elif c in _INT_COLS:
+            out[c] = np.asarray(rows[c], dtype=np.int64)
+        elif c == "crossed":
+            out[c] = np.asarray(rows[c], dtype=bool)
+        else:
+            out[c] = np.asarray(rows[c], dtype=object)
+    return out
+
+
+def iter_fill_batches(
+    source: Source,
+    batch_size: int = 65536,
+    coins: Optional[Iterable[str]] = None,
+    users: Optional[Iterable[str]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream a node fills file as columnar NumPy batches keyed by :data:`FILL_COLUMNS`.
+
+    Optional filters keep only fills for ``coins``, for ``users`` (addresses,
+    case-insensitive) and with ``start_ms <= time < end_ms``. Lines are first
+    checked with a byte search for the quoted coin/user so blocks without a
+    match are never JSON-decoded.
+    """
+    coin_set = set(coins) if coins else None
+    user_set = {u.lower() for u in users} if users else None
+    coin_tokens = [f'"{c}"'.encode() for c in coin_set] if coin_set else None
+    user_tokens = [f'"{u}"'.encode() for u in user_set] if user_set else None
+    rows = _empty_lists()
+    n = 0
+    for line in iter_lines(source):
+        if not line.strip():
+            continue
+        if coin_tokens is not None and not any(t in line for t in coin_tokens):
+            continue
+        if user_tokens is not None:
+            low = line.lower()
+            if not any(t in low for t in user_tokens):
+                continue
+        for user, f, block in _iter_events(json_loads(line)):
+            if coin_set is not None and f.get("coin") not in coin_set:
+                continue
+            if user_set is not None and str(user).lower() not in user_set:
+                continue
+            t = f.get("time", 0)
+            if (start_ms is not None and t < start_ms) or (end_ms is not None and t >= end_ms):
+                continue
+            rows["time"].append(t)
+            rows["block_number"].append(block)
+            rows["coin"].append(f.get("coin", ""))
+            rows["user"].append(user)
+            rows["side"].append(f.get("side", ""))
+            rows["dir"].append(f.get("dir", ""))
+            rows["px"].append(float(f.get("px", "nan")))
+            rows["sz"].append(float(f.get("sz", "nan")))
+            rows["fee"].append(float(f.get("fee", "nan")))
+            rows["fee_token"].append(f.get("feeToken", ""))
+            rows["closed_pnl"].append(float(f.get("closedPnl", "nan")))
+            rows["start_position"].append(float(f.get("startPosition", "nan")))
+            rows["crossed"].append(bool(f.get("crossed", False)))
+            rows["oid"].append(f.get("oid", -1))
+            rows["tid"].append(f.get("tid", -1))
+            rows["hash"].append(f.get("hash", ""))
+            n += 1
+        if n >= batch_size:
+            yield _to_arrays(rows)
+            rows = _empty_lists()
+            n = 0
+    if n:
+        yield _to_arrays(rows)
+
+
+def concat_fill_batches(batches) -> Dict[str, np.ndarray]:
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in FILL_COLUMNS}
+    for b in batches:
+        for c in FILL_COLUMNS:
+            parts[c].append(b[c])
+    if not parts["time"]:
+        return _to_arrays(_empty_lists())
+    return {c: np.concatenate(parts[c]) for c in FILL_COLUMNS}
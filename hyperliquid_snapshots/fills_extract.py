@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .convert import source_part_name, write_partitions
+from .fills import concat_fill_batches, iter_fill_batches
+from .listing_cache import prefix_date
+from .s3_utils import get_s3_client
+from .transfer import iter_s3_decompressed
+
+HOUR_MS = 3_600_000
+
+# per-process S3 client, created by _init_worker
+_client = None
+
+
+def _init_worker(profile: Optional[str], region: Optional[str]) -> None:
+    global _client
+    _client = get_s3_client(profile=profile, region=region)
+
+
+def key_time_range(key: str) -> Optional[Tuple[int, int]]:
+    """[start, end) epoch ms covered by an hourly key such as ``.../20250610/9.lz4``."""
+    date = prefix_date(key)
+    stem = os.path.basename(key).split(".", 1)[0]
+    if date is None or not stem.isdigit():
+        return None
+    day = datetime.strptime(date, "%Y%m%d").replace(tzinfo=timezone.utc)
+    start = int(day.timestamp() * 1000) + int(stem) * HOUR_MS
+    return start, start + HOUR_MS
+
+
+def _counted(chunks: Iterable[bytes], counter: List[int]) -> Iterator[bytes]:
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def _extract_one(
+    bucket: str,
+    key: str,
+    out_root: str,
+    coins: Optional[Sequence[str]],
+    users: Optional[Sequence[str]],
+    start_ms: Optional[int],
+    end_ms: Optional[int],
+) -> Tuple[List[str], int, int]:
+    counter = [0]
+    chunks = _counted(iter_s3_decompressed(_client, bucket, key), counter)
+    cols = concat_fill_batches(
+        iter_fill_batches(chunks, coins=coins, users=users, start_ms=start_ms, end_ms=end_ms)
+    )
+    df = pd.DataFrame(cols)
+    df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True).dt.as_unit("ms")
+    outputs = write_partitions(df, out_root, "fills", source_part_name(key))
+    return outputs, len(df), counter[0]
+
+
+def extract_fills(
+    bucket: str,
+    keys: Sequence[str],
+    out_root: str,
+    coins: Optional[Sequence[str]] = None,
+    users: Optional[Sequence[str]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    processes: Optional[int] = None,
+    profile: Optional[str] = None,
+    region: Optional[str] = None,
+) -> List[str]:
+    """Stream fills objects from S3 and keep only the matching fills.
+
+    Each object is decompressed and filtered in memory by a worker process and
+    the matches are written to the ``fills`` table of the Parquet dataset at
+    ``out_root`` (same layout as ``convert``). Raw data never touches disk.
+    Hourly keys entirely outside [start_ms, end_ms) are not downloaded.
+    """
+    todo = []
+    for key in keys:
+        rng = key_time_range(key)
+        if rng is not None:
+            if (start_ms is not None and rng[1] <= start_ms) or (
+                end_ms is not None and rng[0] >= end_ms
+            ):
+                continue
+        todo.append(key)
+    if len(todo) < len(keys):
+        print(f"Skipped {len(keys) - len(todo)} object(s) outside the time window")
+
+    written: List[str] = []
+    matched = scanned = 0
+    if not todo:
+        return written
+    workers = min(len(todo), processes or os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(profile, region)
+    ) as pool:
+        futures = {
+            pool.submit(_extract_one, bucket, k, out_root, coins, users, start_ms, end_ms): k
+            for k in todo
+        }
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                outputs, n, nbytes = fut.result()
+            except Exception as e:
+                print(f"WARN: failed {key}: {e}")
+                continue
+            written.extend(outputs)
+            matched += n
+            scanned += nbytes
+            print(f"Extracted: {key} -> {n} fill(s)")
+    print(f"Matched {matched} fill(s) from {scanned / 1e6:.1f} MB of raw fills")
+    return written
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .decompress import iter_file_chunks, iter_lz4_decompressed
+
+try:
+    import orjson as _orjson  # type: ignore
+
+    json_loads = _orjson.loads
+except Exception:  # pragma: no cover - depends on environment
+    import json as _json
+
+    json_loads = _json.loads
+
+# Column order of every batch; ``time`` is epoch milliseconds, the rest float64.
+COLUMNS = (
+    "time",
+    "best_bid_px",
+    "best_bid_sz",
+    "best_ask_px",
+    "best_ask_sz",
+    "mid_price",
+    "spread",
+    "total_bid_size",
+    "total_ask_size",
+)
+
+Source = Union[str, Iterable[bytes]]
+
+
+def _split_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    tail = b""
+    for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def iter_lines(source: Source) -> Iterator[bytes]:
+    """Yield raw JSON lines from a path (``.lz4`` or plain) or a byte-chunk stream.
+
+    A chunk stream is expected to be already decompressed, e.g. the output of
+    :func:`hyperliquid_snapshots.transfer.iter_s3_decompressed`.
+    """
+    if isinstance(source, str):
+        chunks: Iterable[bytes] = iter_file_chunks(source)
+        if source.lower().endswith(".lz4"):
+            chunks = iter_lz4_decompressed(chunks)
+    else:
+        chunks = source
+    return _split_lines(chunks)
+
+
+def _empty_lists() -> Dict[str, list]:
+    return {c: [] for c in COLUMNS}
+
+
+def _to_arrays(rows: Dict[str, list]) -> Dict[str, np.ndarray]:
+    out = {c: np.asarray(rows[c], dtype=np.float64) for c in COLUMNS[1:]}
+    out["time"] = np.asarray(rows["time"], dtype=np.int64)
+    return {c: out[c] for c in COLUMNS}
+
+
+def iter_l2book_batches(source: Source, batch_size: int = 65536) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream an l2Book file as columnar NumPy batches.
+
+    Each batch maps :data:`COLUMNS` to equal-length arrays. Snapshots whose
+    ``levels`` lack a bid or ask list are skipped; a side that is present but
+    empty is kept and yields NaN best price/size (and mid/spread).
+    """
+    nan = float("nan")
+    rows = _empty_lists()
+    (t_col, bb_px, bb_sz, ba_px, ba_sz, mid, spr, tot_b, tot_a) = (rows[c] for c in COLUMNS)
+    n = 0
+    for line in iter_lines(source):
+        if not line.strip():
+            continue
+        data = json_loads(line).get("raw", {}).get("data", {})
+        levels = data.get("levels") or []
+        if len(levels) < 2:
+            continue
+        bids, asks = levels[0], levels[1]
+        if bids:
+            bp, bs = float(bids[0]["px"]), float(bids[0]["sz"])
+        else:
+            bp = bs = nan
+        if asks:
+            ap, az = float(asks[0]["px"]), float(asks[0]["sz"])
+        else:
+            ap = az = nan
+        t_col.append(data.get("time", 0))
+        bb_px.append(bp)
+        bb_sz.append(bs)
+        ba_px.append(ap)
+        ba_sz.append(az)
+        mid.append((bp + ap) / 2)
+        spr.append(ap - bp)
+        tot_b.append(sum(float(lv["sz"]) for lv in bids))
+        tot_a.append(sum(float(lv["sz"]) for lv in asks))
+        n += 1
+        if n >= batch_size:
+            yield _to_arrays(rows)
+            rows = _empty_lists()
+            (t_col, bb_px, bb_sz, ba_px, ba_sz, mid, spr, tot_b, tot_a) = (rows[c] for c in COLUMNS)
+            n = 0
+    if n:
+        yield _to_arrays(rows)
+
+
+def concat_batches(batches: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in COLUMNS}
+    for b in batches:
+        for c in COLUMNS:
+            parts[c].append(b[c])
+    return {
+        c: np.concatenate(parts[c]) if parts[c] else np.empty(0, np.int64 if c == "time" else np.float64)
+        for c in COLUMNS
+    }
+
+
+def read_l2book(source: Source) -> Dict[str, np.ndarray]:
+    """Parse a whole l2Book file into one columnar dict."""
+    return concat_batches(iter_l2book_batches(source))
+
+
+def read_l2book_files(paths: Sequence[str], processes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Parse several l2Book files (e.g. one per hour) across worker processes.
+
+    Results are concatenated in ``paths`` order.
+    """
+    if not paths:
+        return concat_batches([])
+    workers = min(len(paths), processes or os.cpu_count() or 1)
+    if workers <= 1:
+        return concat_batches(read_l2book(p) for p in paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return concat_batches(pool.map(read_l2book, paths))
+
+
+def to_record_batch(cols: Dict[str, np.ndarray]):
+    """Convert a columnar dict to a ``pyarrow.RecordBatch`` with a UTC ms timestamp."""
+    import pyarrow as pa
+
+    arrays = [pa.array(cols["time"], type=pa.timestamp("ms", tz="UTC"))]
+    arrays += [pa.array(cols[c]) for c in COLUMNS[1:]]
+    return pa.RecordBatch.from_arrays(arrays, names=list(COLUMNS))
+
+
+def to_dataframe(cols: Dict[str, np.ndarray]):
+    """Convert a columnar dict to a pandas DataFrame sorted by a UTC ``time`` column."""
+    import pandas as pd
+
+    df = pd.DataFrame({c: cols[c] for c in COLUMNS})
+    df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True)
+    return df.sort_values("time", kind="stable").reset_index(drop=True)
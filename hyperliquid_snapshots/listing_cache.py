@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hyper-pipeline", "listings")
+DEFAULT_TTL = 3600.0
+
+_DATE_SEGMENT = re.compile(r"(?:^|/)(\d{8})(?:[/.]|$)")
+_OBJECT_FIELDS = ("Key", "Size", "ETag", "LastModified")
+
+
+def prefix_date(prefix: str) -> Optional[str]:
+    """The YYYYMMDD segment of a prefix such as ``market_data/20250610/9/``, if any."""
+    m = _DATE_SEGMENT.search(prefix)
+    return m.group(1) if m else None
+
+
+def _slim(obj: dict) -> dict:
+    out = {k: obj[k] for k in _OBJECT_FIELDS if k in obj}
+    if isinstance(out.get("LastModified"), datetime):
+        out["LastModified"] = out["LastModified"].isoformat()
+    return out
+
+
+class ListingCache:
+    """On-disk cache of S3 listings keyed by bucket, prefix and listing kind.
+
+    Listings under a date older than the newest date of that dataset are
+    treated as immutable and kept forever; everything else (the date lists
+    themselves and the newest date) expires after ``ttl`` seconds. With
+    ``refresh`` every lookup misses and the fresh listing overwrites the entry.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        refresh: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.refresh = refresh
+
+    def _path(self, bucket: str, kind: str, prefix: str) -> str:
+        digest = hashlib.sha1(f"{bucket}\0{kind}\0{prefix}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, bucket, f"{digest}.json")
+
+    def _newest_date(self, bucket: str, prefix: str) -> str:
+        """Newest date known under the dataset root of ``prefix``.
+
+        Taken from a cached date-level listing of the root when there is one,
+        otherwise yesterday (UTC) so that only recent dates are re-listed.
+        """
+        root = prefix.split("/", 1)[0] + "/"
+        entry = self._read(bucket, "prefixes", root)
+        dates = [d for d in (prefix_date(p) for p in (entry or {}).get("items", [])) if d]
+        if dates:
+            return max(dates)
+        return (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y%m%d")
+
+    def is_permanent(self, bucket: str, prefix: str) -> bool:
+        date = prefix_date(prefix)
+        return date is not None and date < self._newest_date(bucket, prefix)
+
+    def _read(self, bucket: str, kind: str, prefix: str) -> Optional[dict]:
+        path = self._path(bucket, kind, prefix)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, bucket: str, kind: str, prefix: str) -> Optional[List]:
+        """Cached items for a listing, or None if missing, expired or refreshing."""
+        if self.refresh:
+            return None
+        entry = self._read(bucket, kind, prefix)
+        if entry is None:
+            return None
+        if not entry.get("permanent") and time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry["items"]
+
+    def put(self, bucket: str, kind: str, prefix: str, items: List) -> None:
+        if kind == "objects":
+            items = [_slim(o) for o in items]
+        entry = {
+            "bucket": bucket,
+            "kind": kind,
+            "prefix": prefix,
+            "fetched_at": time.time(),
+            "permanent": self.is_permanent(bucket, prefix),
+            "items": items,
+        }
+        path = self._path(bucket, kind, prefix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Optional
+
+MANIFEST_NAME = ".fetch_manifest.jsonl"
+
+
+def _etag(obj: dict) -> str:
+    return str(obj.get("ETag", "")).strip('"')
+
+
+class Manifest:
+    """Append-only record of objects fetched under an output root.
+
+    Each line is a JSON entry ``{key, size, etag, path, decompressed}``; on load
+    the last entry per key wins, so an interrupted run only loses the objects
+    that had not completed yet. ``path`` is the local compressed copy (None
+    once removed with --rm-lz4) and ``decompressed`` the decompressed output.
+    """
+
+    def __init__(self, out_root: str, name: str = MANIFEST_NAME) -> None:
+        self.path = os.path.join(out_root, name)
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn final line from an interrupted write
+                        continue
+                    self.entries[entry["key"]] = entry
+
+    def lookup(self, obj: dict) -> Optional[dict]:
+        """Return the entry for ``obj`` if size and ETag match and a recorded file still exists."""
+        entry = self.entries.get(obj.get("Key", ""))
+        if entry is None:
+            return None
+        if entry.get("size") != obj.get("Size") or entry.get("etag") != _etag(obj):
+            return None
+        files = [p for p in (entry.get("path"), entry.get("decompressed")) if p]
+        if not any(os.path.exists(p) for p in files):
+            return None
+        return entry
+
+    def record(
+        self,
+        obj: dict,
+        path: Optional[str] = None,
+        decompressed: Optional[str] = None,
+    ) -> dict:
+        entry = {
+            "key": obj.get("Key", ""),
+            "size": obj.get("Size"),
+            "etag": _etag(obj),
+            "path": path,
+            "decompressed": decompressed,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.entries[entry["key"]] = entry
+        return entry
+
+    def adopt(self, obj: dict, dest: str) -> Optional[dict]:
+        """Record a pre-existing local copy whose size matches the listing.
+
+        Lets files fetched before the manifest existed be skipped on the next run.
+        """
+        if obj.get("Size") is None or not os.path.exists(dest):
+            return None
+        if os.path.getsize(dest) != obj["Size"]:
+            return None
+        return self.record(obj, path=dest)
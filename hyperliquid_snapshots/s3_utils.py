@@ -4,20 +4,52 @@ import os
 from typing import Iterator, List, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from .listing_cache import ListingCache
 
-def get_s3_client(profile: Optional[str] = None, region: Optional[str] = None):
+MB = 1024 * 1024
+
+
+def get_s3_client(
+    profile: Optional[str] = None,
+    region: Optional[str] = None,
+    max_pool_connections: Optional[int] = None,
+):
     """Create a boto3 S3 client.
 
-    Honors optional AWS profile and region.
+    Honors optional AWS profile and region. The client is thread-safe and can be
+    shared by download workers; size ``max_pool_connections`` to the number of
+    concurrent requests so workers do not queue on the HTTP connection pool.
     """
     if profile:
         session = boto3.Session(profile_name=profile, region_name=region)
     else:
         session = boto3.Session(region_name=region)
-    return session.client("s3", config=Config(signature_version="s3v4"))
+    cfg = Config(signature_version="s3v4")
+    if max_pool_connections:
+        cfg = cfg.merge(Config(max_pool_connections=max_pool_connections))
+    return session.client("s3", config=cfg)
+
+
+def make_transfer_config(
+    multipart_threshold_mb: int = 8,
+    multipart_chunksize_mb: int = 8,
+    max_concurrency: int = 10,
+) -> TransferConfig:
+    """Build the multipart TransferConfig used for downloads.
+
+    Objects above the threshold are fetched as ranged parts by up to
+    ``max_concurrency`` threads per object.
+    """
+    return TransferConfig(
+        multipart_threshold=multipart_threshold_mb * MB,
+        multipart_chunksize=multipart_chunksize_mb * MB,
+        max_concurrency=max_concurrency,
+        use_threads=max_concurrency > 1,
+    )
 
 
 def list_prefixes(
@@ -26,11 +58,18 @@ def list_prefixes(
     prefix: str,
     delimiter: str = "/",
     request_payer: str = "requester",
+    cache: Optional[ListingCache] = None,
 ) -> List[str]:
     """List common prefixes ("folders") under a given prefix using Delimiter.
 
-    Returns a list of child prefixes (each ending with '/').
+    Returns a list of child prefixes (each ending with '/'). Served from
+    ``cache`` when it holds a current listing.
     """
+    kind = "prefixes" if delimiter == "/" else f"prefixes{delimiter}"
+    if cache is not None:
+        cached = cache.get(bucket, kind, prefix)
+        if cached is not None:
+            return list(cached)
     paginator = client.get_paginator("list_objects_v2")
     prefixes: List[str] = []
     try:
@@ -46,6 +85,8 @@ def list_prefixes(
                     prefixes.append(p)
     except ClientError as e:
         raise e
+    if cache is not None:
+        cache.put(bucket, kind, prefix, prefixes)
     return prefixes
 
 
@@ -54,8 +95,20 @@ def iter_objects(
     bucket: str,
     prefix: str,
     request_payer: str = "requester",
+    cache: Optional[ListingCache] = None,
 ) -> Iterator[dict]:
-    """Iterate all S3 objects under a prefix."""
+    """Iterate all S3 objects under a prefix.
+
+    With ``cache``, a current cached listing is replayed; otherwise the full
+    listing is fetched and stored before yielding.
+    """
+    if cache is not None:
+        cached = cache.get(bucket, "objects", prefix)
+        if cached is None:
+            cached = list(iter_objects(client, bucket, prefix, request_payer=request_payer))
+            cache.put(bucket, "objects", prefix, cached)
+        yield from cached
+        return
     paginator = client.get_paginator("list_objects_v2")
     for page in paginator.paginate(
         Bucket=bucket,
@@ -100,12 +153,53 @@ def download_s3_file(
     key: str,
     dest_path: str,
     request_payer: str = "requester",
+    transfer_config: Optional[TransferConfig] = None,
 ) -> str:
     """Download a single S3 object to dest_path.
 
-    Returns the dest_path.
+    The object is written to ``dest_path + ".part"`` and renamed into place on
+    success. Returns the dest_path.
     """
     ensure_dir_for_file(dest_path)
     extra = {"RequestPayer": request_payer}
-    client.download_file(bucket, key, dest_path, ExtraArgs=extra)
+    tmp = dest_path + ".part"
+    try:
+        client.download_file(bucket, key, tmp, ExtraArgs=extra, Config=transfer_config)
+        os.replace(tmp, dest_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
     return dest_path
+
+
+def iter_s3_chunks(
+    client,
+    bucket: str,
+    key: str,
+    chunk_size: int = MB,
+    request_payer: str = "requester",
+) -> Iterator[bytes]:
+    """Yield the raw bytes of an S3 object as they arrive from get_object."""
+    resp = client.get_object(Bucket=bucket, Key=key, RequestPayer=request_payer)
+    body = resp["Body"]
+    try:
+        for chunk in body.iter_chunks(chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+def object_meta(
+    client,
+    bucket: str,
+    key: str,
+    request_payer: str = "requester",
+    cache: Optional[ListingCache] = None,
+) -> Optional[dict]:
+    """Return the listing entry (Key, Size, ETag, ...) for a single key, or None."""
+    for obj in iter_objects(
+        client, bucket=bucket, prefix=key, request_payer=request_payer, cache=cache
+    ):
+        if obj.get("Key") == key:
+            return obj
+    return None
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from boto3.s3.transfer import TransferConfig
+
+from .decompress import decompress_lz4_file, default_output_path, iter_lz4_decompressed
+from .manifest import Manifest
+from .s3_utils import download_s3_file, ensure_dir_for_file, iter_s3_chunks
+
+
+def _exists(path: Optional[str]) -> bool:
+    return bool(path) and os.path.exists(path)  # type: ignore[arg-type]
+
+
+def _tee(chunks: Iterable[bytes], fout) -> Iterator[bytes]:
+    for chunk in chunks:
+        fout.write(chunk)
+        yield chunk
+
+
+def iter_s3_decompressed(client, bucket: str, key: str) -> Iterator[bytes]:
+    """Yield the decompressed bytes of an S3 object straight from get_object.
+
+    Keys that do not end in ``.lz4`` are passed through unchanged.
+    """
+    chunks = iter_s3_chunks(client, bucket=bucket, key=key)
+    if key.lower().endswith(".lz4"):
+        return iter_lz4_decompressed(chunks)
+    return chunks
+
+
+def stream_s3_file(
+    client,
+    bucket: str,
+    key: str,
+    out_path: Optional[str],
+    lz4_path: Optional[str] = None,
+    on_data: Optional[Callable[[bytes], None]] = None,
+) -> Optional[str]:
+    """Download and decompress an object in one pass, without an intermediate file.
+
+    Decompressed bytes go to ``out_path`` (skipped when None) and/or to the
+    ``on_data`` callback, e.g. a parser. The compressed copy is only written
+    when ``lz4_path`` is given. All files are written to temporaries and
+    renamed into place once the object has been fully read.
+    """
+    targets: List[Tuple[str, str]] = []
+    with ExitStack() as stack:
+        chunks: Iterable[bytes] = iter_s3_chunks(client, bucket=bucket, key=key)
+        if lz4_path:
+            ensure_dir_for_file(lz4_path)
+            targets.append((lz4_path + ".part", lz4_path))
+            chunks = _tee(chunks, stack.enter_context(open(targets[-1][0], "wb")))
+        if key.lower().endswith(".lz4"):
+            chunks = iter_lz4_decompressed(chunks)
+        fout = None
+        if out_path:
+            ensure_dir_for_file(out_path)
+            targets.append((out_path + ".part", out_path))
+            fout = stack.enter_context(open(targets[-1][0], "wb"))
+        try:
+            for data in chunks:
+                if fout is not None:
+                    fout.write(data)
+                if on_data is not None:
+                    on_data(data)
+        except BaseException:
+            stack.close()
+            for tmp, _ in targets:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+    for tmp, final in targets:
+        os.replace(tmp, final)
+    return out_path
+
+
+def run_downloads(
+    client,
+    bucket: str,
+    jobs: Sequence[Tuple[dict, str]],
+    n_jobs: int = 1,
+    decompress: bool = False,
+    rm_lz4: bool = False,
+    transfer_config: Optional[TransferConfig] = None,
+    decompress_jobs: Optional[int] = None,
+    manifest: Optional[Manifest] = None,
+    stream: bool = False,
+) -> List[str]:
+    """Download (listing entry, dest) pairs with a bounded worker pool.
+
+    Downloads share ``client`` and run on ``n_jobs`` threads. Finished ``.lz4``
+    files are handed to a separate decompression pool so decompression of one
+    object overlaps the downloads of the others. Failures are reported per object
+    and do not stop the run.
+
+    When a ``manifest`` is given, objects whose size and ETag match a recorded
+    entry with files still on disk are skipped (or only decompressed, if that
+    step is missing), and every completed step is recorded.
+
+    With ``stream=True`` each ``.lz4`` object is decompressed while it
+    downloads (see :func:`stream_s3_file`); the compressed copy is kept only
+    when ``rm_lz4`` is False. Returns the paths written in this run.
+    """
+    downloaded: List[str] = []
+    n_decomp = decompress_jobs or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as dl_pool, ThreadPoolExecutor(
+        max_workers=n_decomp
+    ) as dc_pool:
+        dl_futures: Dict[Future, Tuple[dict, str]] = {}
+        dc_futures: Dict[Future, Tuple[dict, str]] = {}
+
+        def submit_decompress(obj: dict, src: str) -> None:
+            dc = dc_pool.submit(decompress_lz4_file, src, remove_src=rm_lz4)
+            dc_futures[dc] = (obj, src)
+
+        for obj, dest in jobs:
+            key = obj.get("Key", "")
+            entry = None
+            if manifest is not None:
+                entry = manifest.lookup(obj) or manifest.adopt(obj, dest)
+            is_lz4 = dest.lower().endswith(".lz4")
+            if entry is not None:
+                want_out = (decompress or stream) and is_lz4
+                if want_out and not _exists(entry.get("decompressed")):
+                    if _exists(entry.get("path")):
+                        submit_decompress(obj, entry["path"])
+                        continue
+                else:
+                    print(f"Skipped (unchanged): {key}")
+                    continue
+            if stream and is_lz4:
+                fut = dl_pool.submit(
+                    stream_s3_file,
+                    client,
+                    bucket=bucket,
+                    key=key,
+                    out_path=default_output_path(dest),
+                    lz4_path=None if rm_lz4 else dest,
+                )
+            else:
+                fut = dl_pool.submit(
+                    download_s3_file,
+                    client,
+                    bucket=bucket,
+                    key=key,
+                    dest_path=dest,
+                    transfer_config=transfer_config,
+                )
+            dl_futures[fut] = (obj, dest)
+
+        for fut in as_completed(dl_futures):
+            obj, dest = dl_futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                print(f"WARN: failed {obj.get('Key', '')}: {e}")
+                continue
+            if stream and dest.lower().endswith(".lz4"):
+                kept = None if rm_lz4 else dest
+                downloaded.append(result)
+                if manifest is not None:
+                    manifest.record(obj, path=kept, decompressed=result)
+                print(f"Streamed: {result}")
+                continue
+            downloaded.append(dest)
+            if manifest is not None:
+                manifest.record(obj, path=dest)
+            print(f"Downloaded: {dest}")
+            # some fills may not be lz4; only decompress if suffix is .lz4
+            if decompress and dest.lower().endswith(".lz4"):
+                submit_decompress(obj, dest)
+
+        for fut in as_completed(dc_futures):
+            obj, src = dc_futures[fut]
+            try:
+                out = fut.result()
+            except Exception as e:
+                print(f"WARN: failed {obj.get('Key', '')}: {e}")
+                continue
+            if manifest is not None:
+                manifest.record(obj, path=None if rm_lz4 else src, decompressed=out)
+            print(f"Decompressed: {out}")
+    return downloaded